@@ -1,11 +1,14 @@
 import re
+import logging
 import time
 import random
 import threading
 import os
 import requests
 import undetected_chromedriver as uc
+from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
 import threading
 import time
 from requests.adapters import HTTPAdapter
@@ -14,6 +17,8 @@ from bs4 import BeautifulSoup
 from sqlite_helper import SQLiteHelper
 from metrics_collector import MetricsCollector
 
+logger = logging.getLogger(__name__)
+
 
 # ─────────────────────────────────────────────────────────────────────────────
 # AsuraComicHelper
@@ -72,7 +77,7 @@ if RES_PROXY:
         "http": RES_PROXY,
         "https": RES_PROXY,
     }
-    print("[AsuraComic] Residential proxy enabled")
+    logger.debug("Residential proxy enabled")
 
 retry = Retry(
     total=5,
@@ -119,18 +124,16 @@ def warmup_session() -> bool:
     """
     try:
         resp = _SESSION.get(BASE_URL, timeout=10)
-        print(f"[AsuraComic] Warmup -> {resp.status_code}  (cookies: {dict(resp.cookies)})")
+        logger.debug("Warmup -> %s  (cookies: %s)", resp.status_code, dict(resp.cookies))
         if resp.status_code == 200:
             return True
-        print(f"[AsuraComic] WARNING: Warmup returned {resp.status_code}. "
-              f"The site may be blocking server/datacenter IPs.")
+        logger.warning("Warmup returned %s. The site may be blocking server/datacenter IPs.", resp.status_code)
         return False
     except requests.Timeout:
-        print("[AsuraComic] Warmup TIMED OUT – the site may be blocking this IP. "
-              "Consider using a residential proxy.")
+        logger.warning("Warmup TIMED OUT – the site may be blocking this IP. Consider using a residential proxy.")
         return False
     except Exception as exc:
-        print(f"[AsuraComic] Warmup failed: {exc}")
+        logger.warning("Warmup failed: %s", exc)
         return False
 
 
@@ -153,37 +156,37 @@ class AsuraComicHelper:
             try:
                 resp = _SESSION.get(url, timeout=10)
                 resp.raise_for_status()
-                print(f"[AsuraComic] GET {url} -> {resp.status_code} ({len(resp.content)} bytes)")
+                logger.debug("GET %s -> %s (%s bytes)", url, resp.status_code, len(resp.content))
                 return resp.text
             except requests.HTTPError as exc:
                 status = exc.response.status_code if exc.response else "unknown"
                 if status == 429:
                     wait = 60
-                    print(f"[AsuraComic] Rate-limited (429) – sleeping {wait}s")
+                    logger.warning("Rate-limited (429) – sleeping %ss", wait)
                     self.metrics.record_error("rate_limits")
                 else:
                     wait = 3 * (attempt + 1) + random.uniform(0, 2)
-                    print(f"[AsuraComic] HTTP {status} on {url} (attempt {attempt + 1}) – retrying in {wait:.1f}s")
+                    logger.warning("HTTP %s on %s (attempt %s) – retrying in %.1fs", status, url, attempt + 1, wait)
                     self.metrics.record_error("api_errors")
                 time.sleep(wait)
             except requests.Timeout:
                 wait = 3 * (attempt + 1) + random.uniform(0, 2)
-                print(f"[AsuraComic] Timeout on {url} (attempt {attempt + 1}) – retrying in {wait:.1f}s")
-                print(f"[AsuraComic] NOTE: Repeated timeouts may indicate the server is blocking this IP.")
+                logger.warning("Timeout on %s (attempt %s) – retrying in %.1fs", url, attempt + 1, wait)
+                logger.warning("NOTE: Repeated timeouts may indicate the server is blocking this IP.")
                 self.metrics.record_error("api_errors")
                 time.sleep(wait)
             except requests.ConnectionError as exc:
                 wait = 3 * (attempt + 1) + random.uniform(0, 2)
-                print(f"[AsuraComic] Connection error on {url} (attempt {attempt + 1}): {exc} – retrying in {wait:.1f}s")
+                logger.warning("Connection error on %s (attempt %s): %s – retrying in %.1fs", url, attempt + 1, exc, wait)
                 self.metrics.record_error("api_errors")
                 time.sleep(wait)
             except Exception as exc:
                 wait = 3 * (attempt + 1) + random.uniform(0, 2)
-                print(f"[AsuraComic] Unexpected {type(exc).__name__} on {url} (attempt {attempt + 1}): {exc} – retrying in {wait:.1f}s")
+                logger.warning("Unexpected %s on %s (attempt %s): %s – retrying in %.1fs", type(exc).__name__, url, attempt + 1, exc, wait)
                 self.metrics.record_error("api_errors")
                 time.sleep(wait)
 
-        print(f"[AsuraComic] Gave up after {retries} attempts: {url}")
+        logger.warning("Gave up after %s attempts: %s", retries, url)
         return None
 
     # ─────────────────────────────────────────────────────────────────────────
@@ -193,7 +196,7 @@ class AsuraComicHelper:
     def _slug_for(self, manga_id: str) -> str:
         slug = self._slug_map.get(manga_id)
         if not slug:
-            print(f"[AsuraComic] WARNING: no slug cached for {manga_id}")
+            logger.warning("No slug cached for %s", manga_id)
         return slug
 
     # ─────────────────────────────────────────────────────────────────────────
@@ -249,7 +252,7 @@ class AsuraComicHelper:
                     "tags":        [],   # populated on detail fetch
                 })
             except Exception as exc:
-                print(f"[AsuraComic] Card parse error: {exc}")
+                logger.warning("Card parse error: %s", exc)
 
         return manga_list
 
@@ -309,7 +312,7 @@ class AsuraComicHelper:
                 "tags":        tags,
             }
         except Exception as exc:
-            print(f"[AsuraComic] Detail parse error: {exc}")
+            logger.warning("Detail parse error: %s", exc)
             return None
 
     # ─────────────────────────────────────────────────────────────────────────
@@ -381,10 +384,17 @@ class AsuraComicHelper:
         driver = self._get_driver()
 
         try:
-            print(f"[AsuraComic] Rendering chapter")
+            logger.debug("Rendering chapter")
 
             driver.get(chapter_url)
-            time.sleep(3)
+            try:
+                # Return as soon as the reader has images instead of always
+                # paying a fixed settle time
+                WebDriverWait(driver, 10).until(
+                    lambda d: d.find_elements(By.CSS_SELECTOR, "div.center img[src^='http']")
+                )
+            except TimeoutException:
+                logger.warning("No reader images after 10s")
 
             imgs = driver.find_elements(By.CSS_SELECTOR, "div.center img")
 
@@ -397,11 +407,11 @@ class AsuraComicHelper:
                     seen.add(src)
                     urls.append(src)
 
-            print(f"[AsuraComic] Found {len(urls)} pages")
+            logger.debug("Found %s pages", len(urls))
             return urls
 
         except Exception as exc:
-            print(f"[AsuraComic] Browser error: {exc}")
+            logger.warning("Browser error: %s", exc)
             return []
 
     # ─────────────────────────────────────────────────────────────────────────
@@ -412,7 +422,7 @@ class AsuraComicHelper:
         page = (offset // ITEMS_PER_PAGE) + 1
         url  = f"{BASE_URL}/series?page={page}"
 
-        print(f"[AsuraComic] Fetching listing page {page} (offset={offset})")
+        logger.debug("Fetching listing page %s (offset=%s)", page, offset)
         html = self._get_html(url)
         if not html:
             return []
@@ -427,7 +437,7 @@ class AsuraComicHelper:
             return None
         url = f"{BASE_URL}/series/{slug}"
 
-        print(f"[AsuraComic] Fetching detail: {url}")
+        logger.debug("Fetching detail: %s", url)
         html = self._get_html(url)
         if not html:
             self.metrics.record_error("api_errors")
@@ -437,10 +447,11 @@ class AsuraComicHelper:
         soup = BeautifulSoup(html, "html.parser")
         return self._parse_detail_page(soup, manga_id)
 
-    def set_latest_chapters(self, manga) -> bool:
+    def set_latest_chapters(self, manga, force: bool = False) -> bool:
         """
         Fetch the chapter list for *manga*, attach it to the manga object,
-        and return True if there are new chapters to download.
+        and return True if there are new chapters to download; with force,
+        True whenever chapters were found.
         Matches MangaDexHelper.set_latest_chapters() contract exactly.
         """
         slug = self._slug_for(manga.get_id())
@@ -448,13 +459,11 @@ class AsuraComicHelper:
             return False
         url = f"{BASE_URL}/series/{slug}"
 
-        # Use the hash directly as the table name (hyphens → underscores)
-        table_name      = manga.get_id().replace("-", "_")
-        existing_latest = self.db.get_manga_latest_chapter(table_name, manga.get_id())
+        existing_latest = self.db.get_manga_latest_chapter("manga_metadata", manga.get_id())
 
         time.sleep(random.uniform(1, 4))
 
-        print(f"[AsuraComic] Fetching chapters for {manga.get_id()} ({slug})")
+        logger.debug("Fetching chapters for %s (%s)", manga.get_id(), slug)
         html = self._get_html(url)
         if not html:
             return False
@@ -473,25 +482,17 @@ class AsuraComicHelper:
         chapters = self._parse_chapter_list(soup, slug)
 
         if not chapters:
-            print(f"[AsuraComic] No chapters found for {manga.get_id()}")
+            logger.debug("No chapters found for %s", manga.get_id())
             return False
 
-        class _MockResponse:
-            def __init__(self, data):
-                self._data = data
-            def json(self):
-                return {"data": self._data}
-
-        manga.set_chapters(_MockResponse(chapters))
+        manga.set_chapters(chapters)
         should_download = manga.set_latest_chapter()
 
-        if existing_latest is not None:
+        if existing_latest is not None and not force:
             if manga.get_latest_chapter() <= existing_latest:
-                print(f"[AsuraComic] No new chapters for {manga.get_id()} "
-                      f"(latest={manga.get_latest_chapter()}, db={existing_latest})")
+                logger.debug("No new chapters for %s (latest=%s, db=%s)", manga.get_id(), manga.get_latest_chapter(), existing_latest)
                 return False
-            print(f"[AsuraComic] New chapters for {manga.get_id()} "
-                  f"(latest={manga.get_latest_chapter()}, db={existing_latest})")
+            logger.debug("New chapters for %s (latest=%s, db=%s)", manga.get_id(), manga.get_latest_chapter(), existing_latest)
 
         return should_download
 
@@ -502,8 +503,7 @@ class AsuraComicHelper:
         Matches MangaDexHelper.download_chapters() contract exactly.
         """
         existing_chapters_status = self.db.get_chapters_with_status(manga.get_id())
-        print(f"[AsuraComic] {len(existing_chapters_status)} existing chapters in DB "
-              f"for {manga.get_id()}")
+        logger.debug("%s existing chapters in DB for %s", len(existing_chapters_status), manga.get_id())
 
         worker_id = (
             threading.current_thread().name.split("-")[0]
@@ -518,14 +518,10 @@ class AsuraComicHelper:
             is_new_chapter = chapter_num not in existing_chapters_status
             if chapter_num in existing_chapters_status:
                 existing_pages = existing_chapters_status[chapter_num]["pages"]
-                print(f"[AsuraComic] Chapter {chapter_num} has "
-                      f"{len(existing_pages)} pages in DB")
+                logger.debug("Chapter %s has %s pages in DB", chapter_num, len(existing_pages))
 
             time.sleep(random.uniform(2, 6))
-            print(f"[AsuraComic] Processing chapter {chapter_num}")
-
-            # Table is named after the manga hash so it matches the metadata hash column
-            self.db.create_page_urls_table(manga.get_id())
+            logger.debug("Processing chapter %s", chapter_num)
 
             pages_info = self._store_chapter_pages(
                 chapter_url=chapter_url,
@@ -565,7 +561,7 @@ class AsuraComicHelper:
         self.metrics.record_api_call("page_urls")
 
         if not page_urls:
-            print(f"[AsuraComic] No pages found for chapter {chapter_num}")
+            logger.debug("No pages found for chapter %s", chapter_num)
             return None
 
         total_pages = len(page_urls)
@@ -576,48 +572,31 @@ class AsuraComicHelper:
         ]
 
         if not missing:
-            print(f"[AsuraComic] Chapter {chapter_num} already complete "
-                  f"({total_pages} pages) – skipping")
+            logger.debug("Chapter %s already complete (%s pages) – skipping", chapter_num, total_pages)
             return {"total": total_pages, "downloaded": 0, "skipped": total_pages}
 
-        print(f"[AsuraComic] Chapter {chapter_num}: storing "
-              f"{len(missing)}/{total_pages} pages")
+        logger.debug("Chapter %s: storing %s/%s pages", chapter_num, len(missing), total_pages)
 
-        threads = []
-        for page_number, page_url in missing:
-            t = threading.Thread(
-                target=self._threaded_store_page,
-                args=(manga_id, manga_name, chapter_num, page_number, page_url),
+        try:
+            self.db.store_page_urls_bulk(
+                manga_id=manga_id,
+                manga_name=manga_name,
+                chapter_num=chapter_num,
+                pages=missing,
             )
-            threads.append(t)
-            t.start()
-        for t in threads:
-            t.join()
+        except Exception as exc:
+            logger.warning("Failed to store page URLs: %s", exc)
+            for _ in missing:
+                self.metrics.record_page_failure()
+            self.metrics.record_error("db_errors")
+            return {
+                "total":      total_pages,
+                "downloaded": 0,
+                "skipped":    len(existing_pages),
+            }
 
         return {
             "total":      total_pages,
             "downloaded": len(missing),
             "skipped":    len(existing_pages),
         }
-
-    def _threaded_store_page(
-        self,
-        manga_id: str,
-        manga_name: str,
-        chapter_num: str,
-        page_number: int,
-        page_url: str,
-    ) -> None:
-        try:
-            self.db.store_page_url(
-                manga_id=manga_id,
-                manga_name=manga_name,
-                chapter_num=chapter_num,
-                page_number=page_number,
-                page_url=page_url,
-            )
-            print(f"[AsuraComic] Stored {manga_name} ch.{chapter_num} pg.{page_number}")
-        except Exception as exc:
-            print(f"[AsuraComic] Failed to store page URL: {exc}")
-            self.metrics.record_page_failure()
-            self.metrics.record_error("db_errors")
\ No newline at end of file
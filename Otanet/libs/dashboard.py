@@ -67,12 +67,12 @@ def request_queue_worker():
                 continue
 
             manga = MangaFactory(manga_data)
-            should_download = helper.set_latest_chapters(manga)
+            should_download = helper.set_latest_chapters(manga, force=True)
             SQLiteHelper().insert_manga_metadata("manga_metadata", manga)
 
+            # The S3 upload thread ships the database once it has changed
             if should_download:
                 helper.download_chapters(manga)
-                helper.data_to_s3()
 
             active_requests[manga_id] = "completed"
             print(f"[QUEUE] Finished {manga_id}")
@@ -94,10 +94,9 @@ def process_requested_manga(manga_id):
 
     manga = MangaFactory(manga_data)
 
-    should_download = helper.set_latest_chapters(manga)
+    should_download = helper.set_latest_chapters(manga, force=True)
     if should_download:
         helper.download_chapters(manga)
-        helper.data_to_s3()
         print(f"Finished processing requested manga {manga_id}")
     else:
         print(f"No new chapters for requested manga {manga_id}")
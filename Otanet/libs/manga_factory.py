@@ -1,9 +1,12 @@
 from mangadex_helper import MangaDexHelper
 import pandas as pd
 import os
+import logging
 from utils import Utils
 import random
 
+logger = logging.getLogger(__name__)
+
 class MangaFactory:
     def __init__(self, params):
         self.id = params["id"]
@@ -42,7 +45,7 @@ class MangaFactory:
             self.latest_chapter = float(self.chapters[-1]['attributes']['chapter'])
             return True
         except:
-            print(f"Could not set latest chapter for manga {self.id}")
+            logger.debug("Could not set latest chapter for manga %s", self.id)
             return False
     
     def set_description(self, description):
@@ -52,7 +55,9 @@ class MangaFactory:
         self.tags = tags
 
     def set_chapters(self, chapters):
-        chapters = list(filter(lambda chapter_num: self.utils.is_float(chapter_num['attributes']['chapter']) != False, chapters.json()["data"]))
+        if not isinstance(chapters, list):
+            chapters = chapters.json()["data"]
+        chapters = list(filter(lambda chapter_num: self.utils.is_float(chapter_num['attributes']['chapter']) != False, chapters))
         chapters = sorted(chapters, key=lambda chapter_num: float(chapter_num['attributes']['chapter']))
         self.chapters = chapters
     
@@ -77,7 +82,7 @@ class MangaFactory:
         
         if self.should_append():
             with open(self.csv_name, 'a') as f:
-                print("Appending Data")
+                logger.debug("Appending Data")
                 manga_metadata.to_csv(f, header=False)
         else:
-            print("Data exists in dataframe")
\ No newline at end of file
+            logger.debug("Data exists in dataframe")
\ No newline at end of file
@@ -1,22 +1,134 @@
 import requests
 import os
-import re
-import boto3
-import botocore.exceptions
-import string
+import logging
 import time
 import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from utils import Utils
-from sqlite_helper import SQLiteHelper
+from rate_limiter import RateLimiter
+from sqlite_helper import SQLiteHelper, _shared_s3_client
 from metrics_collector import MetricsCollector
-import random
+
+logger = logging.getLogger(__name__)
+
+# One pooled session for every MangaDexHelper, so API calls, cover fetches
+# and at-home lookups from all workers reuse keep-alive connections instead
+# of a fresh TCP + TLS handshake per request. pool_maxsize covers every
+# worker's feed threads at once. Transient 5xx answers are retried with
+# backoff inside the session; 429s are left to the callers, which honour
+# MangaDex's own X-RateLimit-Retry-After (urllib3 only reads Retry-After).
+_SESSION = requests.Session()
+_retry = Retry(
+    total=5,
+    backoff_factor=1,
+    status_forcelist=[500, 502, 503, 504],
+)
+_adapter = HTTPAdapter(pool_connections=16, pool_maxsize=64, max_retries=_retry)
+_SESSION.mount("http://", _adapter)
+_SESSION.mount("https://", _adapter)
+
+# Shared by every MangaDexHelper so the limits hold across all workers:
+# MangaDex allows about 5 requests/s overall and 40/min on at-home/server.
+# Callers only wait when a budget is actually spent, not on every request.
+_API_LIMITER     = RateLimiter(rate=5, per=1.0)
+_AT_HOME_LIMITER = RateLimiter(rate=40, per=60.0)
+
+# One chapter-level pool for every worker and manga: a manga with a hundred
+# new chapters spreads over all of it while others are idle, instead of
+# being held to a few threads of its own. _AT_HOME_LIMITER keeps the total
+# request rate in bounds however many chapters are in flight.
+CHAPTER_WORKERS = 16
+_CHAPTER_POOL = ThreadPoolExecutor(max_workers=CHAPTER_WORKERS, thread_name_prefix="md-chapter")
+
+# Likewise one pool for the remaining pages of every manga's chapter feed,
+# rather than a short-lived pool per manga inside the concurrent checks
+FEED_WORKERS = 8
+_FEED_POOL = ThreadPoolExecutor(max_workers=FEED_WORKERS, thread_name_prefix="md-feed")
+
+# Upper bound on the entries each of the maps below remembers; a full lap
+# of list offsets is about 4000 manga. A forgotten entry only costs one
+# chapter-feed fetch the skip checks would otherwise have saved.
+LIST_CACHE_SIZE = 8192
+
+
+class _LRUMap:
+    """Thread-safe map that drops its least recently used entry past maxsize"""
+    __slots__ = ('_data', '_maxsize', '_lock')
+
+    def __init__(self, maxsize):
+        self._data = OrderedDict()
+        self._maxsize = maxsize
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self._maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            return self._data.pop(key, default)
+
+    def update(self, items):
+        for key, value in items.items():
+            self[key] = value
+
+
+# offset -> ETag of the list page last served for it, sent back as
+# If-None-Match so an unchanged page costs a bodyless 304
+_LIST_ETAGS = _LRUMap(LIST_CACHE_SIZE)
+# manga id -> latestUploadedChapter as shown by the newest list page, and as
+# of the last chapter-feed check; equal values mean nothing was uploaded
+_LISTED_LATEST_UPLOAD = _LRUMap(LIST_CACHE_SIZE)
+_CHECKED_LATEST_UPLOAD = _LRUMap(LIST_CACHE_SIZE)
+# manga id -> (upload id, chapter number) of that latest upload, looked up
+# for a whole list page in one request; only kept for uploads in a language
+# we follow
+_LISTED_LATEST_CHAPTER = _LRUMap(LIST_CACHE_SIZE)
+
+
+def _retry_after_seconds(response, default=60):
+    """
+    Seconds to wait before retrying a rate-limited response.
+    MangaDex sends X-RateLimit-Retry-After as a unix timestamp; fall back to
+    the standard Retry-After header (seconds) and then to *default*.
+    """
+    retry_at = response.headers.get('X-RateLimit-Retry-After')
+    if retry_at and retry_at.isdigit():
+        return max(1, int(retry_at) - time.time())
+    retry_after = response.headers.get('Retry-After')
+    if retry_after and retry_after.isdigit():
+        return int(retry_after)
+    return default
+
+
+def _page_number(filename):
+    """
+    Page number of a MangaDex at-home filename ("<N>-<hash>.<ext>") as a string.
+    Slices the leading field instead of regex-scanning the whole name and only
+    falls back to the regex for names that do not follow that format.
+    """
+    head = filename.split('-', 1)[0]
+    if head.isdigit():
+        return str(int(head))
+    return str(Utils().get_first_number(filename))
 
 
 class MangaDexHelper:
-    def __init__(self):
-        self.s3_client = boto3.client('s3')
-        self.s3_resource = boto3.resource('s3')
-        self.bucket = self.s3_resource.Bucket('otanet-manga-devo')
+    def __init__(self, s3_client=None):
+        self._s3_client = s3_client
         self.utils = Utils()
         self.db = SQLiteHelper()
         self.metrics = MetricsCollector()
@@ -24,94 +136,188 @@ class MangaDexHelper:
         self.base_url = "https://api.mangadex.org"
         self.pagnation_limit = 25
         self.languages = ["en"]
-        self.root_directory = os.getcwd()
+        self.feed_limit = 100
+        self.recheck_interval = int(os.getenv("MANGADEX_RECHECK_SECONDS", 6 * 60 * 60))
+    
+    @property
+    def s3_client(self):
+        # Every worker builds its own helper; they all share the one client
+        # the database helpers use instead of each creating their own
+        if self._s3_client is None:
+            self._s3_client = _shared_s3_client()
+        return self._s3_client
     
     def get_recent_manga(self, offset):
-        base_response = requests.get(
+        """
+        Manga dicts for the list page at offset, or None when MangaDex
+        reports the page unchanged since it was last fetched
+        """
+        etag = _LIST_ETAGS.get(offset)
+        base_response = _SESSION.get(
             f"{self.base_url}/manga",
             params={"limit": self.pagnation_limit,
-                    "offset": offset}
+                    "offset": offset},
+            headers={"If-None-Match": etag} if etag else None
         )
-        
         self.metrics.record_api_call('manga_list')
+        if base_response.status_code == 304:
+            logger.debug("List page at offset %s unchanged", offset)
+            return None
+        base_response.raise_for_status()
+        if base_response.headers.get("ETag"):
+            _LIST_ETAGS[offset] = base_response.headers["ETag"]
 
         manga_list = []
         for manga in base_response.json()["data"]:
-            try: 
-                manga_relationships = next((obj for obj in manga["relationships"] if obj["type"] == "cover_art"), False)
-                cover_id = self.get_manga_cover_id(manga_relationships)
-      
-                tags = []
-                for tag in manga["attributes"]["tags"]:
-                    tags.append(self.utils.normalize_database_text(tag["attributes"]["name"]["en"]))
-                
-                manga_list.append({
-                    'id': manga['id'],
-                    'title': self.utils.normalize_database_text(manga["attributes"]["title"]["en"]),
-                    'description': self.utils.normalize_database_text(manga["attributes"]["description"]["en"]),
-                    'cover_img': f"https://uploads.mangadex.org/covers/{manga['id']}/{cover_id}",
-                    'tags': tags
-                })
-            except:
+            attributes = manga.get("attributes") or {}
+            _LISTED_LATEST_UPLOAD[manga["id"]] = attributes.get("latestUploadedChapter")
+            # Dropped until the lookup below confirms the new upload, so a
+            # number from an older upload is never compared against
+            _LISTED_LATEST_CHAPTER.pop(manga["id"], None)
+            title = (attributes.get("title") or {}).get("en")
+            description = (attributes.get("description") or {}).get("en")
+            cover_art = next((obj for obj in manga.get("relationships", []) if obj.get("type") == "cover_art"), None)
+            if title is None or description is None or cover_art is None:
+                continue
+
+            try:
+                cover_id = self.get_manga_cover_id(cover_art)
+            except (KeyError, TypeError, ValueError, requests.RequestException) as e:
+                logger.debug("Could not get cover for manga %s: %s", manga.get("id"), e)
                 continue
+
+            manga_list.append({
+                'id': manga['id'],
+                'title': self.utils.normalize_database_text(title),
+                'description': self.utils.normalize_database_text(description),
+                'cover_img': f"https://uploads.mangadex.org/covers/{manga['id']}/{cover_id}",
+                'tags': self._english_tags(attributes)
+            })
+        # One /chapter request for the page tells set_latest_chapters which
+        # manga cannot have anything newer than the database already holds
+        upload_ids = [upload_id for upload_id in (_LISTED_LATEST_UPLOAD.get(manga['id']) for manga in manga_list)
+                      if upload_id]
+        try:
+            _LISTED_LATEST_CHAPTER.update(self._fetch_chapter_numbers(upload_ids))
+        except (KeyError, TypeError, ValueError, requests.RequestException) as e:
+            logger.debug("Could not look up latest uploads for offset %s: %s", offset, e)
+
         return manga_list
+
+    def _fetch_chapter_numbers(self, chapter_ids):
+        """
+        Chapter number of each of chapter_ids, fetched in a single request.
+        Returns {manga_id: (chapter_id, float)}, leaving out chapters with no
+        numeric chapter or in a language we don't follow
+        """
+        if not chapter_ids:
+            return {}
+        _API_LIMITER.acquire()
+        response = _SESSION.get(
+            f"{self.base_url}/chapter",
+            params=[("ids[]", chapter_id) for chapter_id in chapter_ids] + [("limit", len(chapter_ids))]
+        )
+        self.metrics.record_api_call('chapter_feed')
+        response.raise_for_status()
+
+        numbers = {}
+        for chapter in response.json().get("data", []):
+            attributes = chapter.get("attributes") or {}
+            manga = next((obj for obj in chapter.get("relationships", []) if obj.get("type") == "manga"), None)
+            if manga is None or attributes.get("translatedLanguage") not in self.languages:
+                continue
+            if self.utils.is_float(attributes.get("chapter")):
+                numbers[manga["id"]] = (chapter["id"], float(attributes["chapter"]))
+        return numbers
     
-    def set_latest_chapters(self, manga):
+    def set_latest_chapters(self, manga, force=False):
         """
         OPTIMIZATION: Check if manga exists in database first
         If it exists and has chapters, only fetch new chapters
+        Manga checked within recheck_interval are skipped unless force=True;
+        with force, True whenever chapters were found, as a queued download
+        restored after a restart already has its latest chapter in the DB
         """
+        if not force:
+            last_checked = self.db.get_manga_last_checked("manga_metadata", manga.get_id())
+            if last_checked is not None and time.time() - last_checked < self.recheck_interval:
+                logger.debug("Manga %s was checked recently, skipping chapter feed", manga.get_id())
+                return False
+
+            listed_upload = _LISTED_LATEST_UPLOAD.get(manga.get_id())
+            if listed_upload is not None and listed_upload == _CHECKED_LATEST_UPLOAD.get(manga.get_id()):
+                logger.debug("No uploads for manga %s since its last check, skipping chapter feed", manga.get_id())
+                return False
+
         # Check if manga exists and get its latest chapter from DB
-        existing_chapter = self.db.get_manga_latest_chapter(manga.get_id().replace('-','_'), manga.get_id())
-        
-        all_chapters = []
-        offset = 0
-        
-        # Fetch all chapters (we need to know the absolute latest)
-        while True:
-            time.sleep(random.uniform(5, 20.0))  # Stagger requests
-            response = requests.get(
-                f"{self.base_url}/manga/{manga.get_id()}/feed",
-                params={"translatedLanguage[]": self.languages, "offset": offset, "limit": 100},
-            )
-            
-            self.metrics.record_api_call('chapter_feed')
+        existing_chapter = self.db.get_manga_latest_chapter("manga_metadata", manga.get_id())
 
-            chapters = response.json().get("data", [])
-            all_chapters.extend(chapters)
+        if not force and existing_chapter is not None:
+            listed_upload, listed_chapter = _LISTED_LATEST_CHAPTER.get(manga.get_id(), (None, None))
+            # Only trusted for the upload the newest list page shows
+            if (listed_upload is not None and listed_upload == _LISTED_LATEST_UPLOAD.get(manga.get_id())
+                    and listed_chapter <= existing_chapter):
+                logger.debug("Latest upload for manga %s is chapter %s, DB has %s, skipping chapter feed",
+                             manga.get_id(), listed_chapter, existing_chapter)
+                _CHECKED_LATEST_UPLOAD[manga.get_id()] = _LISTED_LATEST_UPLOAD.get(manga.get_id())
+                return False
+        
+        # The first page tells us the feed total; the remaining pages are independent
+        # once that is known, so fetch them concurrently instead of one after another.
+        first_page = self._fetch_feed_page(manga.get_id(), 0)
+        all_chapters = first_page.get("data", [])
+        total = first_page.get("total", len(all_chapters))
+        logger.debug("Fetched %d/%d chapters for manga %s at offset 0", len(all_chapters), total, manga.get_id())
 
-            print(f"Fetched {len(chapters)} chapters for manga {manga.get_id()} at offset {offset}")
+        remaining_offsets = range(self.feed_limit, total, self.feed_limit)
+        if remaining_offsets:
+            pages = _FEED_POOL.map(lambda offset: self._fetch_feed_page(manga.get_id(), offset), remaining_offsets)
+            for page in pages:
+                all_chapters.extend(page.get("data", []))
+            logger.debug("Fetched %d chapters for manga %s across %d pages", len(all_chapters), manga.get_id(), len(remaining_offsets) + 1)
 
-            if len(chapters) < 100:
-                break
-            offset += len(chapters)
+        # Only reached once every feed page came back: a failed page raises
+        # out of here, so the manga is not stamped as checked and is retried
+        self.db.set_manga_last_checked("manga_metadata", manga.get_id(), time.time())
 
         if not all_chapters:
-            print(f"No chapters found for manga {manga.get_id()}")
+            logger.debug("No chapters found for manga %s", manga.get_id())
+            _CHECKED_LATEST_UPLOAD[manga.get_id()] = _LISTED_LATEST_UPLOAD.get(manga.get_id())
             return False
 
-        class MockResponse:
-            def __init__(self, data):
-                self._data = data
-
-            def json(self):
-                return {"data": self._data}
-
-        combined_response = MockResponse(all_chapters)
-        manga.set_chapters(combined_response)
+        manga.set_chapters(all_chapters)
+        # The feed is fetched and parsed: this upload has now been seen
+        _CHECKED_LATEST_UPLOAD[manga.get_id()] = _LISTED_LATEST_UPLOAD.get(manga.get_id())
 
         should_download = manga.set_latest_chapter()
         
         # OPTIMIZATION: Only download if there are new chapters
-        if existing_chapter is not None:
+        if existing_chapter is not None and not force:
             if manga.get_latest_chapter() <= existing_chapter:
-                print(f"No new chapters for manga {manga.get_id()} (Latest: {manga.get_latest_chapter()}, DB: {existing_chapter})")
+                logger.debug("No new chapters for manga %s (Latest: %s, DB: %s)", manga.get_id(), manga.get_latest_chapter(), existing_chapter)
                 return False
             else:
-                print(f"New chapters available for manga {manga.get_id()} (Latest: {manga.get_latest_chapter()}, DB: {existing_chapter})")
+                logger.debug("New chapters available for manga %s (Latest: %s, DB: %s)", manga.get_id(), manga.get_latest_chapter(), existing_chapter)
         
         return should_download
         
+    def _fetch_feed_page(self, manga_id, offset):
+        """
+        One page of a manga's chapter feed. Raises on an HTTP error or an
+        error payload, so a failed page is never mistaken for an empty one
+        """
+        _API_LIMITER.acquire()
+        response = _SESSION.get(
+            f"{self.base_url}/manga/{manga_id}/feed",
+            params={"translatedLanguage[]": self.languages, "offset": offset, "limit": self.feed_limit},
+        )
+        self.metrics.record_api_call('chapter_feed')
+        response.raise_for_status()
+        page = response.json()
+        if page.get('result') == 'error':
+            raise ValueError(page.get('errors'))
+        return page
+
     def download_chapters(self, manga):
         """
         IMPROVED: Check which pages are missing from each chapter
@@ -119,64 +325,66 @@ class MangaDexHelper:
         """
         # Get existing chapter pages from database
         existing_chapters_status = self.db.get_chapters_with_status(manga.get_id())
-        print(f"Found {len(existing_chapters_status)} existing chapters in database for manga {manga.get_id()}")
+        logger.debug("Found %d existing chapters in database for manga %s", len(existing_chapters_status), manga.get_id())
         
         worker_id = threading.current_thread().name.split('-')[0] if '-' in threading.current_thread().name else 0
         
-        for chapter in manga.get_chapters():
-            chapter_num = chapter["attributes"]["chapter"].replace('.', '_')
-            
-            # Check if this chapter has any existing pages
-            existing_pages = set()
-            is_new_chapter = chapter_num not in existing_chapters_status
-            
-            if chapter_num in existing_chapters_status:
-                existing_pages = existing_chapters_status[chapter_num]['pages']
-                print(f"Chapter {chapter_num} has {len(existing_pages)} existing pages in database")
-            
-            time.sleep(random.uniform(5, 20.0))  # Stagger chapter downloads
-            print(f"Request for {manga.get_id()} chapter {chapter_num}")
+        # Each chapter is an independent at-home lookup, handed to the
+        # shared pool; wait for this manga's chapters before returning
+        futures = [
+            _CHAPTER_POOL.submit(self._download_chapter, manga, chapter, existing_chapters_status, worker_id)
+            for chapter in manga.get_chapters()
+        ]
+        for future in futures:
+            future.result()
 
-            title = self.utils.normalize_s3_text(manga.get_title())
-            chapter_path = f"{manga.get_id()}/chapter_{chapter_num}"
-            base_key = f"{title}/chapter_{chapter_num}"
-            
-            print("Storing Page URLs to Database (only missing pages)")
-            # Pass existing pages so we only store new ones
-            pages_info = self.store_page_url_to_database(
-                chapter['id'], 
-                title, 
-                chapter_num, 
-                manga.get_id(), 
-                existing_pages
+    def _download_chapter(self, manga, chapter, existing_chapters_status, worker_id):
+        """Store the missing page URLs of one chapter and record its metrics"""
+        chapter_num = chapter["attributes"]["chapter"].replace('.', '_')
+        
+        # Check if this chapter has any existing pages
+        existing_pages = set()
+        is_new_chapter = chapter_num not in existing_chapters_status
+        
+        if chapter_num in existing_chapters_status:
+            existing_pages = existing_chapters_status[chapter_num]['pages']
+            logger.debug("Chapter %s has %d existing pages in database", chapter_num, len(existing_pages))
+        
+        logger.debug("Request for %s chapter %s", manga.get_id(), chapter_num)
+
+        title = self.utils.normalize_s3_text(manga.get_title())
+        chapter_path = f"{manga.get_id()}/chapter_{chapter_num}"
+        base_key = f"{title}/chapter_{chapter_num}"
+        
+        logger.debug("Storing Page URLs to Database (only missing pages)")
+        # Pass existing pages so we only store new ones
+        pages_info = self.store_page_url_to_database(
+            chapter['id'], 
+            title, 
+            chapter_num, 
+            manga.get_id(), 
+            existing_pages
+        )
+        
+        # Record chapter metrics
+        if pages_info:
+            is_complete = pages_info['downloaded'] == 0  # Complete if no pages downloaded
+            self.metrics.record_chapter(
+                worker_id=worker_id,
+                is_new=is_new_chapter,
+                is_complete=is_complete,
+                total_pages=pages_info['total'],
+                downloaded_pages=pages_info['downloaded']
             )
             
-            # Record chapter metrics
-            if pages_info:
-                is_complete = pages_info['downloaded'] == 0  # Complete if no pages downloaded
-                self.metrics.record_chapter(
-                    worker_id=worker_id,
-                    is_new=is_new_chapter,
-                    is_complete=is_complete,
-                    total_pages=pages_info['total'],
-                    downloaded_pages=pages_info['downloaded']
-                )
-                
-                self.metrics.record_pages(
-                    total=pages_info['total'],
-                    downloaded=pages_info['downloaded'],
-                    skipped=pages_info['skipped']
-                )
-            
-            os.chdir(self.root_directory)
-
-    def data_to_s3(self):
-        """Upload database to S3 - only call this periodically, not after every manga"""
-        print("Updating Database")
-        self.s3_client.upload_file(f"otanet_devo.db", self.bucket_name, "database/otanet_devo.db")
+            self.metrics.record_pages(
+                total=pages_info['total'],
+                downloaded=pages_info['downloaded'],
+                skipped=pages_info['skipped']
+            )
 
     def get_requested_manga(self, manga_id):
-        manga = requests.get(
+        manga = _SESSION.get(
             f"{self.base_url}/manga/{manga_id}",
                 params={"translatedLanguage[]": self.languages},
             ).json()
@@ -184,44 +392,47 @@ class MangaDexHelper:
         self.metrics.record_api_call('manga_list')
         
         try:
-            manga_relationships = next((obj for obj in manga['data']["relationships"] if obj["type"] == "cover_art"), False)
-            cover_id = self.get_manga_cover_id(manga_relationships)
-
-            tags = []
-            for tag in manga["data"]["attributes"]["tags"]:
-                try: 
-                    tags.append(self.utils.normalize_database_text(tag["attributes"]["name"]["en"]))
-                except:
-                    continue
-      
-            try:
-                title = (
-                    self.utils.normalize_database_text(manga["data"]["attributes"]["title"]["en"])
-                    or self.utils.normalize_database_text(manga["data"]["attributes"]["altTitles"]["en"][0])
-                    or self.utils.normalize_database_text(manga["data"]["attributes"]["title"]["ja-ro"])
-                    or self.utils.normalize_database_text(manga["data"]["attributes"]["altTitles"]["ja-ro"][0]))
-            except:
-                title = "Title Not Available"
+            attributes = manga["data"]["attributes"]
+            cover_art = next((obj for obj in manga["data"]["relationships"] if obj.get("type") == "cover_art"), None)
+            cover_id = self.get_manga_cover_id(cover_art)
 
-            try:
-                description = self.utils.normalize_database_text(manga["data"]["attributes"]["description"]["en"])
-            except:
+            titles = attributes.get("title") or {}
+            alt_titles = attributes.get("altTitles") or []
+            title = (
+                titles.get("en")
+                or next((alt["en"] for alt in alt_titles if alt.get("en")), None)
+                or titles.get("ja-ro")
+                or next((alt["ja-ro"] for alt in alt_titles if alt.get("ja-ro")), None))
+            title = self.utils.normalize_database_text(title) if title else "Title Not Available"
+
+            description = (attributes.get("description") or {}).get("en")
+            if description is None:
                 description = "Description Not Available"
+            else:
+                description = self.utils.normalize_database_text(description)
             
             dict = {
                     'id': manga['data']['id'],
                     'title': title,
                     'description': description,
                     'cover_img': f"https://uploads.mangadex.org/covers/{manga['data']['id']}/{cover_id}",
-                    'tags': tags
+                    'tags': self._english_tags(attributes)
                 }
             return dict
-        except Exception as e:
-            print(f"Manga not Found: {e}")
+        except (KeyError, TypeError, ValueError, requests.RequestException) as e:
+            logger.warning("Manga not Found: %s", e)
             self.metrics.record_error('api_errors')
+
+    def _english_tags(self, attributes):
+        """Normalized English tag names; tags without an English name are skipped"""
+        return [
+            self.utils.normalize_database_text(tag["attributes"]["name"]["en"])
+            for tag in attributes.get("tags", [])
+            if "en" in tag.get("attributes", {}).get("name", {})
+        ]
         
     def get_manga_cover_id(self, manga_relationships):
-        cover_response = requests.get(f"{self.base_url}/cover/{manga_relationships['id']}")
+        cover_response = _SESSION.get(f"{self.base_url}/cover/{manga_relationships['id']}")
         self.metrics.record_api_call('cover_art')
         return cover_response.json()["data"]["attributes"]["fileName"]
     
@@ -232,13 +443,13 @@ class MangaDexHelper:
             self.s3_client.head_object(Bucket=self.bucket_name, Key=s3_obj_title_key)
         except:
             with open(directory, mode="wb") as f:
-                img_data = requests.get(cover).content
+                img_data = _SESSION.get(cover).content
                 f.write(img_data)
                 self.s3_client.upload_file(directory, self.bucket_name, s3_obj_title_key, ExtraArgs={'ContentType': "image/png"})
             try:
                 os.remove(directory)
             except:
-                print(f"Failed to remove {path}/title directory")
+                logger.warning("Failed to remove %s/title directory", path)
     
     def store_page_url_to_database(self, chapter_id, title, chapter_num, manga_id, existing_pages=None):
         """
@@ -257,7 +468,7 @@ class MangaDexHelper:
         if existing_pages is None:
             existing_pages = set()
         
-        print(f"Fetching page URLs from MangaDex API for chapter {chapter_num}...")
+        logger.debug("Fetching page URLs from MangaDex API for chapter %s...", chapter_num)
 
         retries = 0
         host = None
@@ -266,112 +477,91 @@ class MangaDexHelper:
         
         while retries <= 10:
             try:
-                chapter_resp = requests.get(f"{self.base_url}/at-home/server/{chapter_id}")
-                resp_json = chapter_resp.json()
-                
+                _AT_HOME_LIMITER.acquire()
+                chapter_resp = _SESSION.get(f"{self.base_url}/at-home/server/{chapter_id}")
                 self.metrics.record_api_call('page_urls')
 
-                if 'Rate Limit Exceeded' in str(resp_json):
-                    print("Rate Limited...Backing off for 1 minute")
+                if chapter_resp.status_code == 429:
+                    wait = _retry_after_seconds(chapter_resp)
+                    logger.warning("Rate Limited...Backing off for %.0fs", wait)
                     self.metrics.record_error('rate_limits')
-                    time.sleep(60 * 1)
+                    time.sleep(wait)
                     retries += 1
                     continue
-                
+
+                resp_json = chapter_resp.json()
+                if resp_json.get('result') == 'error':
+                    raise ValueError(resp_json.get('errors'))
+
                 host = resp_json["baseUrl"]
                 chapter_hash = resp_json["chapter"]["hash"]
                 data = resp_json["chapter"]["data"]
-                print("Received Response")
+                logger.debug("Received Response")
                 break
             except Exception as e:
                 retries = retries + 1
-                print(f"Could not get host, hash or data: {e}, attempt {retries}")
+                logger.debug("Could not get host, hash or data: %s, attempt %d", e, retries)
                 self.metrics.record_error('api_errors')
                 time.sleep(retries * 2)
                 continue
         
         if retries > 10 or data is None:
-            print(f"Failed to fetch chapter data after {retries} attempts")
+            logger.warning("Failed to fetch chapter data after %d attempts", retries)
             return None
         
-        # Count total pages and missing pages
-        total_pages = len(data)
-        
-        # Determine which pages are missing
-        missing_pages = []
+        # Single pass over the page list: count, filter and build the rows to store
+        rows = []
+        skipped = 0
         for page in data:
-            page_number = str(self.utils.get_first_number(page))
-            if page_number not in existing_pages:
-                missing_pages.append(page)
+            page_number = _page_number(page)
+            if page_number in existing_pages:
+                skipped += 1
+                continue
+            rows.append((page_number, f"{host}/data/{chapter_hash}/{page}"))
+        total_pages = skipped + len(rows)
         
-        if len(missing_pages) == 0:
-            print(f"Chapter {chapter_num} is complete with all {total_pages} pages, skipping...")
+        if not rows:
+            logger.debug("Chapter %s is complete with all %d pages, skipping...", chapter_num, total_pages)
             return {
                 'total': total_pages,
                 'downloaded': 0,
                 'skipped': total_pages
             }
         
-        print(f"Chapter {chapter_num}: {len(existing_pages)}/{total_pages} pages exist, downloading {len(missing_pages)} missing pages")
+        logger.debug("Chapter %s: %d/%d pages exist, downloading %d missing pages", chapter_num, skipped, total_pages, len(rows))
             
-        # Create table in main thread before starting worker threads
-        self.db.create_page_urls_table(manga_id)
-        
-        # Only process missing pages
-        threads = []
-        for page in missing_pages:
-            dict = {
-                'hash': chapter_hash,
-                'host': host,
-                'page': page,
-                'title': title,
-                'chapter_num': chapter_num,
-                'manga_id': manga_id
+        # All missing pages go to the database in one transaction
+        try:
+            self.db.store_page_urls_bulk(manga_id, title, chapter_num, rows)
+        except Exception as e:
+            logger.warning("Failed to store page URLs to database: %s", e)
+            for _ in rows:
+                self.metrics.record_page_failure()
+            self.metrics.record_error('db_errors')
+            return {
+                'total': total_pages,
+                'downloaded': 0,
+                'skipped': skipped
             }
-            thread = threading.Thread(target=self.threaded_store_page_url, args=(dict, title, chapter_num, manga_id))
-            threads.append(thread)
-            thread.start()
-    
-        for thread in threads:
-            thread.join()
         
-        print(f"Completed storing {len(missing_pages)} missing pages for chapter {chapter_num}")
+        logger.debug("Completed storing %d missing pages for chapter %s", len(rows), chapter_num)
         
         return {
             'total': total_pages,
-            'downloaded': len(missing_pages),
-            'skipped': len(existing_pages)
+            'downloaded': len(rows),
+            'skipped': skipped
         }
 
-    def threaded_store_page_url(self, dict, title, chapter_num, manga_id):
-        thread_id = threading.get_ident()
-        print(f"Thread ID: {thread_id}")
-        
-        # Construct the image URL
-        image_url = f"{dict['host']}/data/{dict['hash']}/{dict['page']}"
-        
-        # Extract page number from page filename
-        page_number = self.utils.get_first_number(dict['page'])
-        
-        # Store page URL to database
-        try:
-            self.db.store_page_url(
-                manga_id=manga_id,
-                manga_name=title,
-                chapter_num=chapter_num,
-                page_number=page_number,
-                page_url=image_url
-            )
-            print(f"Stored page URL for {title} chapter {chapter_num} page {page_number}")
-        except Exception as e:
-            print(f"Failed to store page URL to database: {e}")
-            self.metrics.record_page_failure()
-            self.metrics.record_error('db_errors')
-    
     def get_bucket_keys(self, base_key):
+        """
+        List the page numbers stored directly under base_key/.
+        Uses the list_objects_v2 paginator with a '/' delimiter so only the
+        leaf keys of this prefix are returned, not every nested object.
+        """
         keys = []
-        print("Getting Keys")
-        for obj in self.bucket.objects.filter(Prefix=f"{base_key}/"):
-            obj = obj.key.rsplit('/')
-            keys.append(self.utils.get_first_number(obj[2]))
+        logger.debug("Getting Keys")
+        paginator = self.s3_client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket_name, Prefix=f"{base_key}/", Delimiter='/'):
+            for obj in page.get('Contents', []):
+                keys.append(self.utils.get_first_number(obj['Key'].rsplit('/', 1)[-1]))
         return keys
@@ -1,9 +1,166 @@
+import os
 import time
+import itertools
 import threading
-from collections import defaultdict, deque
+import weakref
+from contextlib import contextmanager
 from datetime import datetime
 import json
 
+
+class AtomicCounter:
+    """
+    Monotonic counter that can be incremented from any thread without a lock.
+    itertools.count.__next__ is a single C call, so increments are atomic
+    under the GIL; reads (dashboard / persistence) are rare and take a lock.
+    """
+    def __init__(self):
+        self._increments = itertools.count()
+        self._reads = 0
+        self._offset = 0
+        self._read_lock = threading.Lock()
+
+    def inc(self):
+        next(self._increments)
+
+    def add(self, amount):
+        if amount == 1:
+            next(self._increments)
+        elif amount:
+            with self._read_lock:
+                self._offset += amount
+
+    def value(self):
+        with self._read_lock:
+            value = next(self._increments) - self._reads
+            self._reads += 1
+            return value + self._offset
+
+
+class RWLock:
+    """
+    Many readers or one writer. Waiting writers hold off new readers so the
+    rare write (a new worker id) cannot be starved by a steady read stream.
+    """
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writers_waiting = 0
+        self._writing = False
+
+    @contextmanager
+    def read(self):
+        with self._cond:
+            while self._writing or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        with self._cond:
+            self._writers_waiting += 1
+            while self._writing or self._readers:
+                self._cond.wait()
+            self._writers_waiting -= 1
+            self._writing = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writing = False
+                self._cond.notify_all()
+
+
+class _WorkerSlot:
+    """
+    Per-worker stats. Counters are atomic and (current_manga, last_activity)
+    is swapped as one tuple, so an existing slot is updated in place under
+    the read lock.
+    """
+    __slots__ = ('manga_processed', 'chapters_downloaded', 'activity', 'last_used')
+
+    def __init__(self):
+        self.manga_processed = AtomicCounter()
+        self.chapters_downloaded = AtomicCounter()
+        self.activity = (None, None)
+        self.last_used = time.monotonic()
+
+
+class _SampleRing:
+    """Fixed-capacity ring of samples, preallocated; push overwrites the oldest"""
+    __slots__ = ('_slots', '_head', '_count')
+
+    def __init__(self, capacity):
+        self._slots = [None] * capacity
+        self._head = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def push(self, sample):
+        capacity = len(self._slots)
+        if self._count == capacity:
+            self._slots[self._head] = sample
+            self._head = (self._head + 1) % capacity
+        else:
+            self._slots[(self._head + self._count) % capacity] = sample
+            self._count += 1
+
+    def drop_oldest(self):
+        self._slots[self._head] = None
+        self._head = (self._head + 1) % len(self._slots)
+        self._count -= 1
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._count
+        return self._slots[(self._head + index) % len(self._slots)]
+
+
+def _counters(*names):
+    return {name: AtomicCounter() for name in names}
+
+
+# High-frequency counters, kept in one shard per recording thread
+_SHARDED_COUNTERS = {
+    'api_calls':     ('manga_list', 'chapter_feed', 'page_urls', 'cover_art', 'total'),
+    'manga_stats':   ('processed', 'new_manga', 'updated_manga', 'skipped_no_chapters', 'with_new_chapters'),
+    'chapter_stats': ('total_chapters', 'new_chapters', 'complete_chapters', 'partial_chapters', 'skipped_complete'),
+    'page_stats':    ('total_pages', 'pages_downloaded', 'pages_skipped', 'failed_downloads'),
+    'error_stats':   ('rate_limits', 'api_errors', 'db_errors', 'network_errors'),
+}
+
+
+def _new_shard():
+    return {group: dict.fromkeys(names, 0) for group, names in _SHARDED_COUNTERS.items()}
+
+
+class _ShardOwner:
+    """
+    Held only in a thread's local storage next to its shard. It is dropped
+    when the thread exits, which is what tells the collector to fold that
+    shard away.
+    """
+    __slots__ = ('__weakref__',)
+
+
+def _values(counters):
+    return {name: counter.value() for name, counter in counters.items()}
+
+
+# Worker ids come from thread names, so pools that recycle threads would
+# otherwise grow worker_stats forever; the least recently used slot goes
+MAX_WORKER_SLOTS = 128
+
+
 class MetricsCollector:
     """
     Centralized metrics collection for the MangaDex scraper
@@ -11,6 +168,7 @@ class MetricsCollector:
     """
     _instance = None
     _lock = threading.Lock()
+    _init_lock = threading.Lock()
     
     def __new__(cls):
         if cls._instance is None:
@@ -24,244 +182,296 @@ class MetricsCollector:
         if self._initialized:
             return
         
-        self.persistence_file = "metrics_state.json"
-        self._load_state()
-        threading.Thread(target=self._auto_save_loop, daemon=True).start()
-
+        # Double-checked: two threads can both get past the check above, and
+        # _initialized is only set once everything, threads included, is up
+        with MetricsCollector._init_lock:
+            if self._initialized:
+                return
             
-        self._initialized = True
-        self.start_time = time.time()
-        
-        # Counters
-        self.api_calls = {
-            'manga_list': 0,
-            'chapter_feed': 0,
-            'page_urls': 0,
-            'cover_art': 0,
-            'total': 0
-        }
-        
-        self.manga_stats = {
-            'processed': 0,
-            'new_manga': 0,
-            'updated_manga': 0,
-            'skipped_no_chapters': 0,
-            'with_new_chapters': 0
-        }
-        
-        self.chapter_stats = {
-            'total_chapters': 0,
-            'new_chapters': 0,
-            'complete_chapters': 0,
-            'partial_chapters': 0,
-            'skipped_complete': 0
-        }
-        
-        self.page_stats = {
-            'total_pages': 0,
-            'pages_downloaded': 0,
-            'pages_skipped': 0,
-            'failed_downloads': 0
-        }
-        
-        self.s3_stats = {
-            'uploads': 0,
-            'upload_bytes': 0,
-            'last_upload': None
-        }
-        
-        self.error_stats = {
-            'rate_limits': 0,
-            'api_errors': 0,
-            'db_errors': 0,
-            'network_errors': 0
-        }
-        
-        self.worker_stats = defaultdict(lambda: {
-            'manga_processed': 0,
-            'chapters_downloaded': 0,
-            'current_manga': None,
-            'last_activity': None
-        })
-        
-        # Time series data (last 60 data points, 1 per second)
-        self.api_rate = deque(maxlen=60)
-        self.download_rate = deque(maxlen=60)
-        
-        # Thread for periodic calculations
-        self.running = True
-        self.metrics_thread = threading.Thread(target=self._calculate_rates, daemon=True)
-        self.metrics_thread.start()
+            self.start_time = time.time()
+            
+            # Counters: each recording thread increments its own shard with no
+            # synchronisation at all; readers sum the shards.
+            self._local = threading.local()
+            self._shards_lock = threading.Lock()
+            self._base_shard = _new_shard()   # restored state from a previous run
+            self._shards = [self._base_shard]
+            
+            # S3 counters are touched by a single thread a few times an hour
+            self.s3_stats = _counters('uploads', 'upload_bytes')
+            self.last_s3_upload = None
+            
+            # Worker slots: the write lock is only taken to add a new worker id,
+            # updates to an existing slot share the read lock
+            self._workers_lock = RWLock()
+            self.worker_stats = {}
+            
+            # Rates are computed when the dashboard asks for them: each read takes
+            # at most one (monotonic time, api total, pages total) sample per
+            # second and measures against the oldest sample in the last minute
+            self._rate_lock = threading.Lock()
+            self._rate_samples = _SampleRing(60)
+            self._rates = (0, 0)
+            self._rates_at = 0
+            
+            self._dirty = False
+            self.running = True
+            
+            self.persistence_file = "metrics_state.json"
+            self._load_state()
+            threading.Thread(target=self._auto_save_loop, daemon=True).start()
+            
+            self._initialized = True
     
+    def _shard(self):
+        """This thread's counter shard, registered on first use"""
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = _new_shard()
+            with self._shards_lock:
+                self._shards.append(shard)
+            # Short-lived pool threads come and go all the time; once this
+            # thread exits its counts move into the base shard
+            owner = _ShardOwner()
+            weakref.finalize(owner, self._retire_shard, shard)
+            self._local.owner = owner
+            self._local.shard = shard
+            return shard
+
+    def _retire_shard(self, shard):
+        """Fold an exited thread's shard into the base shard and drop it"""
+        with self._shards_lock:
+            for group, counters in shard.items():
+                base = self._base_shard[group]
+                for name, value in counters.items():
+                    base[name] += value
+            # By identity: list.remove() compares dicts by value and could
+            # match the base shard
+            self._shards = [s for s in self._shards if s is not shard]
+
+    def _totals(self, group):
+        """Sum one counter group across all thread shards"""
+        totals = dict.fromkeys(_SHARDED_COUNTERS[group], 0)
+        # Under the lock so a shard being folded is never counted twice
+        with self._shards_lock:
+            for shard in self._shards:
+                for name, value in shard[group].items():
+                    totals[name] += value
+        return totals
+
+    @contextmanager
+    def _worker_slot(self, worker_id):
+        """
+        Yield the slot for worker_id, creating it on first use. Recency is a
+        timestamp on the slot rather than dict order, so the shared-lock path
+        never reorders the map; eviction happens only under the write lock.
+        """
+        with self._workers_lock.read():
+            slot = self.worker_stats.get(worker_id)
+            if slot is not None:
+                slot.last_used = time.monotonic()
+                yield slot
+                return
+        with self._workers_lock.write():
+            slot = self.worker_stats.get(worker_id)
+            if slot is None:
+                if len(self.worker_stats) >= MAX_WORKER_SLOTS:
+                    stalest = min(self.worker_stats, key=lambda wid: self.worker_stats[wid].last_used)
+                    del self.worker_stats[stalest]
+                slot = self.worker_stats[worker_id] = _WorkerSlot()
+            slot.last_used = time.monotonic()
+            yield slot
+
     def _auto_save_loop(self):
         while self.running:
-            self._save_state()
+            if self._dirty:
+                self._save_state()
             time.sleep(30)
 
     def _save_state(self):
-        with self._lock:
-            state = {
-                'api_calls': self.api_calls,
-                'manga_stats': self.manga_stats,
-                'chapter_stats': self.chapter_stats,
-                'page_stats': self.page_stats,
-                's3_stats': {
-                    **self.s3_stats,
-                    'last_upload': self.s3_stats['last_upload'].isoformat() if self.s3_stats['last_upload'] else None
-                },
-                'error_stats': self.error_stats
-            }
-            with open(self.persistence_file, "w") as f:
-                json.dump(state, f)
+        # Cleared before the snapshot so a record landing mid-save is picked
+        # up by the next pass rather than lost
+        self._dirty = False
+        state = {
+            'api_calls': self._totals('api_calls'),
+            'manga_stats': self._totals('manga_stats'),
+            'chapter_stats': self._totals('chapter_stats'),
+            'page_stats': self._totals('page_stats'),
+            's3_stats': {
+                **_values(self.s3_stats),
+                'last_upload': self.last_s3_upload.isoformat() if self.last_s3_upload else None
+            },
+            'error_stats': self._totals('error_stats')
+        }
+        # Write beside the target and rename over it, so a crash mid-write
+        # never leaves a truncated state file behind
+        tmp_file = self.persistence_file + ".tmp"
+        with open(tmp_file, "w") as f:
+            json.dump(state, f, separators=(',', ':'))
+        os.replace(tmp_file, self.persistence_file)
 
     def _load_state(self):
         try:
             with open(self.persistence_file, "r") as f:
                 state = json.load(f)
-                self.api_calls.update(state.get('api_calls', {}))
-                self.manga_stats.update(state.get('manga_stats', {}))
-                self.chapter_stats.update(state.get('chapter_stats', {}))
-                self.page_stats.update(state.get('page_stats', {}))
-                self.error_stats.update(state.get('error_stats', {}))
+                for group, counters in self._base_shard.items():
+                    for name, value in state.get(group, {}).items():
+                        if name in counters:
+                            counters[name] += value
         except:
             pass
 
 
-    def _calculate_rates(self):
-        """Calculate per-second rates"""
-        last_api_count = 0
-        last_page_count = 0
-        
-        while self.running:
-            current_api = self.api_calls['total']
-            current_pages = self.page_stats['pages_downloaded']
-            
-            api_per_sec = current_api - last_api_count
-            pages_per_sec = current_pages - last_page_count
+    def _current_rates(self):
+        """(api calls/s, pages/s) over roughly the last minute, cached for 1s"""
+        now = time.monotonic()
+        with self._rate_lock:
+            if now - self._rates_at < 1:
+                return self._rates
             
-            self.api_rate.append(api_per_sec)
-            self.download_rate.append(pages_per_sec)
+            samples = self._rate_samples
+            samples.push((now,
+                            self._totals('api_calls')['total'],
+                            self._totals('page_stats')['pages_downloaded']))
+            # Keep one sample older than the window as the baseline
+            while len(samples) > 2 and now - samples[1][0] >= 60:
+                samples.drop_oldest()
             
-            last_api_count = current_api
-            last_page_count = current_pages
-            
-            time.sleep(1)
+            then, api_then, pages_then = samples[0]
+            _, api_now, pages_now = samples[-1]
+            elapsed = now - then
+            if elapsed > 0:
+                self._rates = ((api_now - api_then) / elapsed, (pages_now - pages_then) / elapsed)
+            self._rates_at = now
+            return self._rates
     
     # API Call Tracking
     def record_api_call(self, call_type='other'):
-        with self._lock:
-            if call_type in self.api_calls:
-                self.api_calls[call_type] += 1
-            self.api_calls['total'] += 1
+        self._dirty = True
+        api_calls = self._shard()['api_calls']
+        if call_type in api_calls:
+            api_calls[call_type] += 1
+        api_calls['total'] += 1
     
     # Manga Tracking
     def record_manga_processed(self, worker_id, manga_title, is_new=False, has_new_chapters=False):
-        with self._lock:
-            self.manga_stats['processed'] += 1
-            if is_new:
-                self.manga_stats['new_manga'] += 1
-            else:
-                self.manga_stats['updated_manga'] += 1
-            
-            if has_new_chapters:
-                self.manga_stats['with_new_chapters'] += 1
-            else:
-                self.manga_stats['skipped_no_chapters'] += 1
-            
-            self.worker_stats[worker_id]['manga_processed'] += 1
-            self.worker_stats[worker_id]['current_manga'] = manga_title
-            self.worker_stats[worker_id]['last_activity'] = datetime.now()
+        self._dirty = True
+        manga_stats = self._shard()['manga_stats']
+        manga_stats['processed'] += 1
+        if is_new:
+            manga_stats['new_manga'] += 1
+        else:
+            manga_stats['updated_manga'] += 1
+        
+        if has_new_chapters:
+            manga_stats['with_new_chapters'] += 1
+        else:
+            manga_stats['skipped_no_chapters'] += 1
+        
+        with self._worker_slot(worker_id) as slot:
+            slot.manga_processed.inc()
+            slot.activity = (manga_title, datetime.now())
     
     # Chapter Tracking
     def record_chapter(self, worker_id, is_new=False, is_complete=True, total_pages=0, downloaded_pages=0):
-        with self._lock:
-            self.chapter_stats['total_chapters'] += 1
-            
-            if is_new:
-                self.chapter_stats['new_chapters'] += 1
-            
-            if is_complete:
-                self.chapter_stats['complete_chapters'] += 1
-            else:
-                self.chapter_stats['partial_chapters'] += 1
-            
-            if downloaded_pages == 0:
-                self.chapter_stats['skipped_complete'] += 1
-            
-            self.worker_stats[worker_id]['chapters_downloaded'] += 1
+        self._dirty = True
+        chapter_stats = self._shard()['chapter_stats']
+        chapter_stats['total_chapters'] += 1
+        
+        if is_new:
+            chapter_stats['new_chapters'] += 1
+        
+        if is_complete:
+            chapter_stats['complete_chapters'] += 1
+        else:
+            chapter_stats['partial_chapters'] += 1
+        
+        if downloaded_pages == 0:
+            chapter_stats['skipped_complete'] += 1
+        
+        with self._worker_slot(worker_id) as slot:
+            slot.chapters_downloaded.inc()
     
     # Page Tracking
     def record_pages(self, total, downloaded, skipped=0):
-        with self._lock:
-            self.page_stats['total_pages'] += total
-            self.page_stats['pages_downloaded'] += downloaded
-            self.page_stats['pages_skipped'] += skipped
+        self._dirty = True
+        page_stats = self._shard()['page_stats']
+        page_stats['total_pages'] += total
+        page_stats['pages_downloaded'] += downloaded
+        page_stats['pages_skipped'] += skipped
     
     def record_page_failure(self):
-        with self._lock:
-            self.page_stats['failed_downloads'] += 1
+        self._dirty = True
+        self._shard()['page_stats']['failed_downloads'] += 1
     
     # S3 Tracking
     def record_s3_upload(self, bytes_uploaded=0):
-        with self._lock:
-            self.s3_stats['uploads'] += 1
-            self.s3_stats['upload_bytes'] += bytes_uploaded
-            self.s3_stats['last_upload'] = datetime.now()
+        self._dirty = True
+        self.s3_stats['uploads'].inc()
+        self.s3_stats['upload_bytes'].add(bytes_uploaded)
+        self.last_s3_upload = datetime.now()
     
     # Error Tracking
     def record_error(self, error_type):
-        with self._lock:
-            if error_type in self.error_stats:
-                self.error_stats[error_type] += 1
+        self._dirty = True
+        error_stats = self._shard()['error_stats']
+        if error_type in error_stats:
+            error_stats[error_type] += 1
     
     # Getters
     def get_uptime(self):
         return time.time() - self.start_time
     
     def get_current_api_rate(self):
-        if len(self.api_rate) == 0:
-            return 0
-        return sum(self.api_rate) / len(self.api_rate)
+        return self._current_rates()[0]
     
     def get_current_download_rate(self):
-        if len(self.download_rate) == 0:
-            return 0
-        return sum(self.download_rate) / len(self.download_rate)
+        return self._current_rates()[1]
     
     def get_all_metrics(self):
         """Return all metrics as a dictionary"""
-        with self._lock:
-            uptime = self.get_uptime()
-            
-            return {
-                'uptime': uptime,
-                'uptime_formatted': self._format_uptime(uptime),
-                'api_calls': dict(self.api_calls),
-                'manga_stats': dict(self.manga_stats),
-                'chapter_stats': dict(self.chapter_stats),
-                'page_stats': dict(self.page_stats),
-                's3_stats': {
-                    **dict(self.s3_stats),
-                    'last_upload': self.s3_stats['last_upload'].isoformat() if self.s3_stats['last_upload'] else None
-                },
-                'error_stats': dict(self.error_stats),
-                'rates': {
-                    'api_per_second': self.get_current_api_rate(),
-                    'pages_per_second': self.get_current_download_rate(),
-                    'manga_per_hour': (self.manga_stats['processed'] / uptime * 3600) if uptime > 0 else 0,
-                    'chapters_per_hour': (self.chapter_stats['total_chapters'] / uptime * 3600) if uptime > 0 else 0
-                },
-                'worker_stats': {
-                    str(worker_id): {
-                            'manga_processed': stats['manga_processed'],
-                            'chapters_downloaded': stats['chapters_downloaded'],
-                            'current_manga': stats['current_manga'],
-                            'last_activity': stats['last_activity'].isoformat() if stats['last_activity'] else None
-                        }
-                    for worker_id, stats in self.worker_stats.items()
-                },
-                'timestamp': datetime.now().isoformat()
+        # Only the worker slot list is copied under the (shared) lock; the
+        # counters are read lock-free and everything is formatted afterwards
+        with self._workers_lock.read():
+            workers = list(self.worker_stats.items())
+        
+        uptime = self.get_uptime()
+        manga_stats = self._totals('manga_stats')
+        chapter_stats = self._totals('chapter_stats')
+        last_upload = self.last_s3_upload
+        
+        worker_stats = {}
+        for worker_id, slot in workers:
+            current_manga, last_activity = slot.activity
+            worker_stats[str(worker_id)] = {
+                'manga_processed': slot.manga_processed.value(),
+                'chapters_downloaded': slot.chapters_downloaded.value(),
+                'current_manga': current_manga,
+                'last_activity': last_activity.isoformat() if last_activity else None
             }
+        
+        return {
+            'uptime': uptime,
+            'uptime_formatted': self._format_uptime(uptime),
+            'api_calls': self._totals('api_calls'),
+            'manga_stats': manga_stats,
+            'chapter_stats': chapter_stats,
+            'page_stats': self._totals('page_stats'),
+            's3_stats': {
+                **_values(self.s3_stats),
+                'last_upload': last_upload.isoformat() if last_upload else None
+            },
+            'error_stats': self._totals('error_stats'),
+            'rates': {
+                'api_per_second': self.get_current_api_rate(),
+                'pages_per_second': self.get_current_download_rate(),
+                'manga_per_hour': (manga_stats['processed'] / uptime * 3600) if uptime > 0 else 0,
+                'chapters_per_hour': (chapter_stats['total_chapters'] / uptime * 3600) if uptime > 0 else 0
+            },
+            'worker_stats': worker_stats,
+            'timestamp': datetime.now().isoformat()
+        }
     
     def _format_uptime(self, seconds):
         days = int(seconds // 86400)
@@ -280,5 +490,3 @@ class MetricsCollector:
     
     def shutdown(self):
         self.running = False
-        if self.metrics_thread.is_alive():
-            self.metrics_thread.join(timeout=2)
@@ -1,11 +1,20 @@
 import re
+import logging
 import time
 import threading
 import random
+import functools
+import importlib.util
+import requests
 from bs4 import BeautifulSoup
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
 from sqlite_helper import SQLiteHelper
 from metrics_collector import MetricsCollector
 
+logger = logging.getLogger(__name__)
+
 # ─────────────────────────────────────────────────────────────────────────────
 # NatoMangaHelper
 # Uses undetected-chromedriver to bypass Cloudflare.
@@ -33,6 +42,79 @@ FEEDS = {
     "completed": "completed-manga",
 }
 
+# _get_html returns as soon as one of these is in the DOM (and the
+# Cloudflare interstitial is gone) instead of sleeping a fixed time
+READY_LIST    = "a.list-story-item, div.list-truyen-item-wrap, div.itemupdate"
+READY_DETAIL  = "h1"
+READY_CHAPTER = "div.container-chapter-reader img, div#vungdoc img, div.panel-read-story img"
+READY_TIMEOUT = 20
+
+# Where the interesting part of a page starts; everything before the first
+# marker (head, nav, scripts) is sliced off before parsing, as is the footer
+LIST_MARKERS    = ("list-story-item", "list-truyen-item-wrap", "itemupdate")
+CHAPTER_MARKERS = ("container-chapter-reader", "vungdoc", "panel-read-story")
+FOOTER_MARKER   = "<footer"
+
+# lxml is several times faster than the stdlib parser; use it when installed
+HTML_PARSER = "lxml" if importlib.util.find_spec("lxml") else "html.parser"
+
+# Chapter anchors across the site's known layouts, matched in one pass
+CHAPTER_LINK_SELECTOR = (
+    "ul.row-content-chapter li a, "
+    "div.chapter-list a[href*='/chapter-'], "
+    "li.a-h a[href*='/chapter-']"
+)
+_WS_RE = re.compile(r"\s+")
+_STRIP_NUL = str.maketrans("", "", "\x00")
+_CHAPTER_RE = re.compile(r"chapter[_-]([\d]+(?:[_.-][\d]+)?)", re.I)
+
+# Tags whose text is dropped from the detail page description
+DESCRIPTION_SKIP_TAGS = {"h3", "strong", "label"}
+
+
+# Once the browser has passed Cloudflare, its cookies and User-Agent are
+# copied into this session and pages are fetched over plain HTTP; the
+# browser is only driven again when a response comes back challenged.
+# Shared by all helper instances since they share the one browser.
+_SESSION = requests.Session()
+CHALLENGE_MARKERS = ("Just a moment", "cf-chl", "challenge-platform")
+HTTP_TIMEOUT = 15
+
+
+# Detail pages are fetched twice in quick succession (get_requested_manga,
+# then set_latest_chapters), so recent ones are kept briefly. Shared by all
+# helper instances since they share the one browser.
+HTML_CACHE_TTL  = 60
+HTML_CACHE_SIZE = 32
+_html_cache: dict[str, tuple[float, str]] = {}
+_html_cache_lock = threading.Lock()
+
+
+def _cached_html(url: str):
+    with _html_cache_lock:
+        entry = _html_cache.get(url)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del _html_cache[url]
+            return None
+        return entry[1]
+
+
+def _cache_html(url: str, html: str) -> None:
+    with _html_cache_lock:
+        _html_cache.pop(url, None)
+        while len(_html_cache) >= HTML_CACHE_SIZE:
+            del _html_cache[next(iter(_html_cache))]  # oldest insert
+        _html_cache[url] = (time.monotonic() + HTML_CACHE_TTL, html)
+
+
+@functools.lru_cache(maxsize=8)
+def _parse_html(html: str) -> BeautifulSoup:
+    # The same page is often parsed more than once (detail + chapter list),
+    # so parsed trees are shared: the parse_* methods must not mutate them.
+    return BeautifulSoup(html, HTML_PARSER)
+
 
 class NatoMangaHelper:
 
@@ -43,24 +125,82 @@ class NatoMangaHelper:
         self.metrics = MetricsCollector()
         
     # ─────────────────────────────────────────────────────────────────────────
-    # Browser fetch  (all HTTP goes through here)
+    # Page fetch  (all HTTP goes through here)
     # ─────────────────────────────────────────────────────────────────────────
 
-    def _get_html(self, url: str, retries: int = 3):
+    @staticmethod
+    def _page_ready(ready_selector):
+        def ready(driver):
+            if "Just a moment" in driver.title:
+                return False
+            return bool(driver.find_elements(By.CSS_SELECTOR, ready_selector))
+        return ready
+
+    def _sync_session(self):
+        """Copy the browser's cookies and User-Agent into _SESSION; call holding driver_lock"""
+        try:
+            for cookie in self.driver.get_cookies():
+                _SESSION.cookies.set(cookie["name"], cookie["value"],
+                                     domain=cookie.get("domain"), path=cookie.get("path", "/"))
+            _SESSION.headers["User-Agent"] = self.driver.execute_script("return navigator.userAgent")
+        except Exception as exc:
+            logger.debug("Could not copy browser session: %s", exc)
+
+    @staticmethod
+    def _get_html_direct(url: str):
+        """
+        Fetch url over _SESSION. Returns None until the browser has handed
+        over its cookies, and whenever Cloudflare challenges the request.
+        """
+        if not _SESSION.cookies:
+            return None
+        try:
+            resp = _SESSION.get(url, timeout=HTTP_TIMEOUT)
+        except requests.RequestException as exc:
+            logger.debug("Direct fetch failed (%s): %s", exc, url)
+            return None
+        if resp.status_code != 200 or any(marker in resp.text for marker in CHALLENGE_MARKERS):
+            logger.debug("Direct fetch challenged (%s), using browser: %s", resp.status_code, url)
+            return None
+        return resp.text
+
+    def _get_html(self, url: str, ready_selector: str = "body", retries: int = 3,
+                  cache: bool = False):
+        if cache:
+            html = _cached_html(url)
+            if html is not None:
+                return html
+
+        html = self._get_html_direct(url)
+        if html is not None:
+            if cache:
+                _cache_html(url, html)
+            return html
+
         for attempt in range(retries):
             try:
                 with self.driver_lock:
                     self.driver.get(url)
-                    time.sleep(random.uniform(3, 6))  # let Cloudflare settle
-                    return self.driver.page_source
+                    try:
+                        WebDriverWait(self.driver, READY_TIMEOUT).until(self._page_ready(ready_selector))
+                    except TimeoutException:
+                        # Hand back whatever rendered; the parsers cope with
+                        # a page that is missing the expected elements
+                        logger.warning("Page not ready after %ss: %s", READY_TIMEOUT, url)
+                    html = self.driver.page_source
+                    self._sync_session()
+
+                if cache:
+                    _cache_html(url, html)
+                return html
 
             except Exception as exc:
                 wait = 2 ** attempt + random.uniform(0, 2)
-                print(f"[NatoManga] Browser error ({exc}) – retrying in {wait:.1f}s")
+                logger.warning("Browser error (%s) – retrying in %.1fs", exc, wait)
                 self.metrics.record_error("api_errors")
                 time.sleep(wait)
 
-        print(f"[NatoManga] Gave up after {retries} attempts: {url}")
+        logger.warning("Gave up after %s attempts: %s", retries, url)
         return None
 
 
@@ -72,7 +212,32 @@ class NatoMangaHelper:
     def _normalize(text: str) -> str:
         if not text:
             return ""
-        return re.sub(r"\s+", " ", text).strip().replace("\x00", "")
+        return _WS_RE.sub(" ", text).strip().translate(_STRIP_NUL)
+
+    @staticmethod
+    def _inside(node, tag_names, stop) -> bool:
+        """True if node sits in one of tag_names below stop"""
+        for parent in node.parents:
+            if parent is stop:
+                return False
+            if parent.name in tag_names:
+                return True
+        return False
+
+    @staticmethod
+    def _extract_fragment(html: str, start_markers, end_marker: str = FOOTER_MARKER) -> str:
+        """
+        Slice html down to the region holding start_markers, beginning at the
+        tag that contains the earliest one. Returns html unchanged when no
+        marker is present so the full-document fallbacks still apply.
+        """
+        found = [i for i in (html.find(m) for m in start_markers) if i != -1]
+        if not found:
+            return html
+        start = html.rfind("<", 0, min(found))
+        start = max(start, 0)
+        end = html.find(end_marker, start)
+        return html[start:end] if end != -1 else html[start:]
 
     @staticmethod
     def _slug_to_id(slug: str) -> str:
@@ -91,8 +256,8 @@ class NatoMangaHelper:
     # ─────────────────────────────────────────────────────────────────────────
 
     def _parse_list_page(self, soup: BeautifulSoup) -> list[dict]:
-        manga_list = []
-        seen = set()
+        # Keyed by slug: dedups and keeps page order in one structure
+        manga_by_slug = {}
 
         cards = (
             soup.select("a.list-story-item")
@@ -111,9 +276,8 @@ class NatoMangaHelper:
                     continue
 
                 slug = href.rstrip("/").split("/manga/")[-1].split("/")[0]
-                if not slug or slug in seen:
+                if not slug or slug in manga_by_slug:
                     continue
-                seen.add(slug)
 
                 title_tag = anchor.select_one("h3") or anchor
                 title = self._normalize(title_tag.get_text())
@@ -121,17 +285,17 @@ class NatoMangaHelper:
                 img = anchor.select_one("img")
                 cover = (img.get("src") or img.get("data-src") or "") if img else ""
 
-                manga_list.append({
+                manga_by_slug[slug] = {
                     "id":          self._slug_to_id(slug),
                     "title":       title,
                     "description": "",
                     "cover_img":   cover,
                     "tags":        [],
-                })
+                }
             except Exception as exc:
-                print(f"[NatoManga] Card parse error: {exc}")
+                logger.warning("Card parse error: %s", exc)
 
-        return manga_list
+        return list(manga_by_slug.values())
 
     # ─────────────────────────────────────────────────────────────────────────
     # Detail page parsing
@@ -159,9 +323,10 @@ class NatoMangaHelper:
             )
             description = ""
             if desc_tag:
-                for el in desc_tag.select("h3, strong, label"):
-                    el.decompose()
-                description = self._normalize(desc_tag.get_text())
+                description = self._normalize("".join(
+                    text for text in desc_tag.strings
+                    if not self._inside(text, DESCRIPTION_SKIP_TAGS, desc_tag)
+                ))
 
             genre_links = (
                 soup.select("td.table-value a[href*='/genre/']")
@@ -177,7 +342,7 @@ class NatoMangaHelper:
                 "tags":        tags,
             }
         except Exception as exc:
-            print(f"[NatoManga] Detail parse error: {exc}")
+            logger.warning("Detail parse error: %s", exc)
             return None
 
     # ─────────────────────────────────────────────────────────────────────────
@@ -185,17 +350,11 @@ class NatoMangaHelper:
     # ─────────────────────────────────────────────────────────────────────────
 
     def _parse_chapter_list(self, soup: BeautifulSoup) -> list[dict]:
-        chapter_anchors = (
-            soup.select("ul.row-content-chapter li a")
-            or soup.select("div.chapter-list a[href*='/chapter-']")
-            or soup.select("li.a-h a[href*='/chapter-']")
-        )
+        hrefs = [a.get("href", "") for a in soup.select(CHAPTER_LINK_SELECTOR)]
 
         chapters = []
-        for a in chapter_anchors:
-            href = a.get("href", "")
-            ch_slug = href.rstrip("/").split("/")[-1]
-            m = re.search(r"chapter[_-]([\d]+(?:[_.-][\d]+)?)", ch_slug, re.I)
+        for href in hrefs:
+            m = _CHAPTER_RE.search(href.rstrip("/").rsplit("/", 1)[-1])
             if not m:
                 continue
             ch_num = m.group(1).replace("_", ".").replace("-", ".")
@@ -212,11 +371,11 @@ class NatoMangaHelper:
     # ─────────────────────────────────────────────────────────────────────────
 
     def _get_chapter_page_urls(self, chapter_url: str) -> list[str]:
-        html = self._get_html(chapter_url)
+        html = self._get_html(chapter_url, READY_CHAPTER)
         if not html:
             return []
 
-        soup = BeautifulSoup(html, "html.parser")
+        soup = _parse_html(self._extract_fragment(html, CHAPTER_MARKERS))
         images = (
             soup.select("div.container-chapter-reader img")
             or soup.select("div#vungdoc img")
@@ -238,74 +397,64 @@ class NatoMangaHelper:
         feed_path = FEEDS.get(feed, "latest-manga")
         url = f"{BASE_URL}/manga-list/{feed_path}?page={page}"
 
-        print(f"[NatoManga] List page {page} ({feed_path})")
-        html = self._get_html(url)
+        logger.debug("List page %s (%s)", page, feed_path)
+        html = self._get_html(url, READY_LIST)
         if not html:
             return []
 
         self.metrics.record_api_call("manga_list")
-        soup = BeautifulSoup(html, "html.parser")
+        soup = _parse_html(self._extract_fragment(html, LIST_MARKERS))
         return self._parse_list_page(soup)
 
     def get_requested_manga(self, manga_id: str) -> dict:
         slug = self._id_to_slug(manga_id)
         url = f"{BASE_URL}/manga/{slug}"
 
-        print(f"[NatoManga] Detail: {url}")
-        html = self._get_html(url)
+        logger.debug("Detail: %s", url)
+        html = self._get_html(url, READY_DETAIL, cache=True)
         if not html:
             self.metrics.record_error("api_errors")
             return None
 
         self.metrics.record_api_call("manga_list")
-        soup = BeautifulSoup(html, "html.parser")
+        soup = _parse_html(html)
         return self._parse_detail_page(soup, manga_id)
 
     def set_latest_chapters(self, manga) -> bool:
         slug = self._id_to_slug(manga.get_id())
         url = f"{BASE_URL}/manga/{slug}"
 
-        table_name = manga.get_id().replace("-", "_")
-        existing_latest = self.db.get_manga_latest_chapter(table_name, manga.get_id())
+        existing_latest = self.db.get_manga_latest_chapter("manga_metadata", manga.get_id())
 
         time.sleep(random.uniform(3, 8))
 
-        print(f"[NatoManga] Fetching chapters for {manga.get_id()}")
-        html = self._get_html(url)
+        logger.debug("Fetching chapters for %s", manga.get_id())
+        html = self._get_html(url, READY_DETAIL, cache=True)
         if not html:
             return False
 
         self.metrics.record_api_call("chapter_feed")
-        soup = BeautifulSoup(html, "html.parser")
+        soup = _parse_html(html)
         chapters = self._parse_chapter_list(soup)
 
         if not chapters:
-            print(f"[NatoManga] No chapters found for {manga.get_id()}")
+            logger.debug("No chapters found for %s", manga.get_id())
             return False
 
-        class _MockResponse:
-            def __init__(self, data):
-                self._data = data
-            def json(self):
-                return {"data": self._data}
-
-        manga.set_chapters(_MockResponse(chapters))
+        manga.set_chapters(chapters)
         should_download = manga.set_latest_chapter()
 
         if existing_latest is not None:
             if manga.get_latest_chapter() <= existing_latest:
-                print(f"[NatoManga] No new chapters for {manga.get_id()} "
-                      f"(latest={manga.get_latest_chapter()}, db={existing_latest})")
+                logger.debug("No new chapters for %s (latest=%s, db=%s)", manga.get_id(), manga.get_latest_chapter(), existing_latest)
                 return False
-            print(f"[NatoManga] New chapters for {manga.get_id()} "
-                  f"(latest={manga.get_latest_chapter()}, db={existing_latest})")
+            logger.debug("New chapters for %s (latest=%s, db=%s)", manga.get_id(), manga.get_latest_chapter(), existing_latest)
 
         return should_download
 
     def download_chapters(self, manga) -> None:
         existing_chapters_status = self.db.get_chapters_with_status(manga.get_id())
-        print(f"[NatoManga] {len(existing_chapters_status)} existing chapters in DB "
-              f"for {manga.get_id()}")
+        logger.debug("%s existing chapters in DB for %s", len(existing_chapters_status), manga.get_id())
 
         worker_id = (
             threading.current_thread().name.split("-")[0]
@@ -320,13 +469,10 @@ class NatoMangaHelper:
             is_new_chapter = chapter_num not in existing_chapters_status
             if chapter_num in existing_chapters_status:
                 existing_pages = existing_chapters_status[chapter_num]["pages"]
-                print(f"[NatoManga] Chapter {chapter_num} has "
-                      f"{len(existing_pages)} pages in DB")
+                logger.debug("Chapter %s has %s pages in DB", chapter_num, len(existing_pages))
 
             time.sleep(random.uniform(4, 10))
-            print(f"[NatoManga] Processing chapter {chapter_num}")
-
-            self.db.create_page_urls_table(manga.get_id())
+            logger.debug("Processing chapter %s", chapter_num)
 
             pages_info = self._store_chapter_pages(
                 chapter_url=chapter_url,
@@ -360,7 +506,7 @@ class NatoMangaHelper:
         self.metrics.record_api_call("page_urls")
 
         if not page_urls:
-            print(f"[NatoManga] No pages found for chapter {chapter_num}")
+            logger.debug("No pages found for chapter %s", chapter_num)
             return None
 
         total_pages = len(page_urls)
@@ -370,41 +516,31 @@ class NatoMangaHelper:
         ]
 
         if not missing:
-            print(f"[NatoManga] Chapter {chapter_num} complete ({total_pages} pages)")
+            logger.debug("Chapter %s complete (%s pages)", chapter_num, total_pages)
             return {"total": total_pages, "downloaded": 0, "skipped": total_pages}
 
-        print(f"[NatoManga] Chapter {chapter_num}: storing "
-              f"{len(missing)}/{total_pages} pages")
-
-        threads = []
-        for page_number, page_url in missing:
-            t = threading.Thread(
-                target=self._threaded_store_page,
-                args=(manga_id, manga_name, chapter_num, page_number, page_url),
-            )
-            threads.append(t)
-            t.start()
-        for t in threads:
-            t.join()
+        logger.debug("Chapter %s: storing %s/%s pages", chapter_num, len(missing), total_pages)
 
-        return {
-            "total":      total_pages,
-            "downloaded": len(missing),
-            "skipped":    len(existing_pages),
-        }
-
-    def _threaded_store_page(self, manga_id, manga_name, chapter_num,
-                             page_number, page_url) -> None:
         try:
-            self.db.store_page_url(
+            self.db.store_page_urls_bulk(
                 manga_id=manga_id,
                 manga_name=manga_name,
                 chapter_num=chapter_num,
-                page_number=page_number,
-                page_url=page_url,
+                pages=missing,
             )
-            print(f"[NatoManga] Stored {manga_name} ch.{chapter_num} pg.{page_number}")
         except Exception as exc:
-            print(f"[NatoManga] Failed to store page URL: {exc}")
-            self.metrics.record_page_failure()
+            logger.warning("Failed to store page URLs: %s", exc)
+            for _ in missing:
+                self.metrics.record_page_failure()
             self.metrics.record_error("db_errors")
+            return {
+                "total":      total_pages,
+                "downloaded": 0,
+                "skipped":    len(existing_pages),
+            }
+
+        return {
+            "total":      total_pages,
+            "downloaded": len(missing),
+            "skipped":    len(existing_pages),
+        }
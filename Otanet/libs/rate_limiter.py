@@ -0,0 +1,36 @@
+import time
+import threading
+
+
+class RateLimiter:
+    """
+    Token bucket shared by every thread that calls the same remote site.
+    Up to `rate` calls may go through back to back; after that callers are
+    spaced out to `rate` per `per` seconds, and only ever sleep for as long
+    as the next token takes to arrive.
+    """
+    def __init__(self, rate, per=1.0):
+        self.capacity = float(rate)
+        self.refill_rate = rate / per   # tokens per second
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.refill_rate)
+            self._updated = now
+
+    def acquire(self):
+        """Take one token, sleeping until one is available"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.refill_rate
+            # Sleep outside the lock so other threads can check in meanwhile
+            time.sleep(wait)
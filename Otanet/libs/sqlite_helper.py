@@ -1,35 +1,391 @@
+import os
+import re
+import pathlib
+import queue
+import hashlib
+import functools
+import itertools
 import sqlite3
 import boto3
+from boto3.s3.transfer import TransferConfig
 import time
-from datetime import datetime
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Applied to every new connection. WAL lets readers run alongside the writer,
+# and synchronous=NORMAL is durable across application crashes in WAL mode
+# while skipping the fsync on every commit.
+CONNECTION_PRAGMAS = """
+    PRAGMA journal_mode=WAL;
+    PRAGMA synchronous=NORMAL;
+    PRAGMA temp_store=MEMORY;
+    PRAGMA cache_size=-65536;
+    PRAGMA mmap_size=268435456;
+"""
+
+# Applied to the writer thread's connection on top of CONNECTION_PRAGMAS.
+# With synchronous=NORMAL the only fsyncs left are at checkpoints, so let
+# the WAL grow to ~40 MB (10000 pages) between them; the S3 upload takes
+# its snapshot through backup(), which reads the WAL too.
+WRITER_PRAGMAS = """
+    PRAGMA wal_autocheckpoint=10000;
+"""
+
+# Prepared statements kept per connection. Every statement string is fixed
+# or built once (see _sql and _insert_page_urls_sql), but the writer alone
+# can see up to PAGE_INSERT_ROWS insert shapes and readers add two
+# statements per legacy page table, which would churn sqlite3's default 128
+STATEMENT_CACHE_SIZE = 512
+
+# Table names cannot be bound as ? parameters, so every name spliced into
+# SQL is checked against this first
+TABLE_NAME_RE = re.compile(r"^[A-Za-z0-9_]+$")
+
+
+def _table_name(name):
+    if not TABLE_NAME_RE.match(name):
+        raise ValueError(f"Invalid table name: {name!r}")
+    return name
+
+
+# Hot-path statements, formatted per table by _sql()
+SQL_TEMPLATES = {
+    "latest_chapter":   "SELECT latest_chapter FROM {t} WHERE hash_key = ?",
+    "get_last_checked": "SELECT last_checked_at FROM {t} WHERE hash_key = ?",
+    "set_last_checked": "UPDATE {t} SET last_checked_at = ? WHERE hash_key = ?",
+    "legacy_chapter_pages": "SELECT page_number FROM [{t}] WHERE chapter_num = ?",
+    "legacy_all_pages":     "SELECT chapter_num, page_number FROM [{t}]",
+    "upsert_metadata":  """INSERT INTO {t} (title, description, tags, hash, hash_key, latest_chapter, cover_img, time) 
+                    VALUES (?,?,?,?,?,?,?,?)
+                    ON CONFLICT(hash_key) DO UPDATE SET
+                        latest_chapter = excluded.latest_chapter,
+                        cover_img = excluded.cover_img,
+                        time = excluded.time
+                    WHERE {t}.latest_chapter IS NULL
+                       OR excluded.latest_chapter > {t}.latest_chapter;""",
+}
+
+
+# Page URLs for every manga live in one table keyed by (manga_id, chapter,
+# page). Older databases kept one table per manga, named after the manga id;
+# those are still read so pages stored there are not fetched again.
+#
+# page_number is INTEGER: the numeric strings callers pass are stored as
+# 8-byte-or-less integers by column affinity, and a chapter's pages sort
+# 1, 2, ..., 10 in the primary key. Reads cast back to TEXT, the form every
+# caller compares against. chapter_num stays TEXT: labels such as "1_1" and
+# "1_10" are different chapters that a REAL column would merge.
+PAGE_URLS_TABLE = "page_urls"
+CREATE_PAGE_URLS_TABLE = f"""CREATE TABLE IF NOT EXISTS {PAGE_URLS_TABLE} (
+        manga_id TEXT NOT NULL,
+        manga_name TEXT NOT NULL,
+        chapter_num TEXT NOT NULL,
+        page_number INTEGER NOT NULL,
+        page_url TEXT NOT NULL,
+        timestamp INTEGER NOT NULL,
+        PRIMARY KEY (manga_id, chapter_num, page_number)
+    ) WITHOUT ROWID;"""
+SELECT_CHAPTER_PAGES = f"SELECT CAST(page_number AS TEXT) FROM {PAGE_URLS_TABLE} WHERE manga_id = ? AND chapter_num = ?"
+SELECT_MANGA_PAGES = f"SELECT chapter_num, CAST(page_number AS TEXT) FROM {PAGE_URLS_TABLE} WHERE manga_id = ?"
+
+# Manga waiting for their chapters to be downloaded. The in-memory queue
+# feeds the downloaders; this table only makes sure a restart picks the
+# work back up instead of losing it
+DOWNLOAD_QUEUE_TABLE = "download_queue"
+CREATE_DOWNLOAD_QUEUE_TABLE = f"""CREATE TABLE IF NOT EXISTS {DOWNLOAD_QUEUE_TABLE} (
+        manga_id TEXT PRIMARY KEY,
+        source TEXT NOT NULL,
+        payload TEXT NOT NULL,
+        enqueued_at INTEGER NOT NULL,
+        attempts INTEGER NOT NULL DEFAULT 0
+    ) WITHOUT ROWID;"""
+ENQUEUE_DOWNLOAD = f"""INSERT INTO {DOWNLOAD_QUEUE_TABLE} (manga_id, source, payload, enqueued_at)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT(manga_id) DO UPDATE SET payload = excluded.payload;"""
+COUNT_DOWNLOAD_ATTEMPT = f"UPDATE {DOWNLOAD_QUEUE_TABLE} SET attempts = attempts + 1 WHERE manga_id = ?"
+FINISH_DOWNLOAD = f"DELETE FROM {DOWNLOAD_QUEUE_TABLE} WHERE manga_id = ?"
+SELECT_PENDING_DOWNLOADS = f"SELECT manga_id, source, payload, attempts FROM {DOWNLOAD_QUEUE_TABLE} ORDER BY enqueued_at"
+
+
+# Pages per multi-row INSERT; 100 rows x 6 columns stays under SQLite's
+# historical 999 bound-parameter limit
+PAGE_INSERT_ROWS = 100
+
+
+@functools.lru_cache(maxsize=PAGE_INSERT_ROWS)
+def _insert_page_urls_sql(row_count):
+    """INSERT for `row_count` pages at once: one statement step instead of one per row"""
+    values = ", ".join(["(?, ?, ?, ?, ?, ?)"] * row_count)
+    return f"""INSERT OR IGNORE INTO {PAGE_URLS_TABLE} 
+    (manga_id, manga_name, chapter_num, page_number, page_url, timestamp)
+    VALUES {values};"""
+
+
+# Manga ids per IN (...) lookup, well under SQLite's bound-parameter limit
+LOOKUP_CHUNK = 500
+
+
+@functools.lru_cache(maxsize=256)
+def _latest_chapters_sql(table, count):
+    """Latest chapter for `count` manga at once, matched on hash_key"""
+    placeholders = ", ".join(["?"] * count)
+    return f"SELECT hash, latest_chapter FROM {_table_name(table)} WHERE hash_key IN ({placeholders})"
+
+
+@functools.lru_cache(maxsize=4096)
+def _sql(name, table):
+    """
+    The statement `name` for `table`, validated and formatted once. Handing
+    sqlite3 the identical string each time keeps its prepared-statement
+    cache hitting.
+    """
+    return SQL_TEMPLATES[name].format(t=_table_name(table))
+
+
+def _hash_key(manga_id):
+    """Fixed-width 16-byte lookup key for a manga id (indexed instead of the raw text)"""
+    return hashlib.md5(manga_id.encode()).digest()
+
+
+# The writer thread commits whatever has queued up, up to this many writes
+# or after waiting this long for more, in one transaction
+WRITE_BATCH_MAX = 256
+WRITE_BATCH_SECONDS = 0.05
+# Writes allowed to wait for the writer before callers block on put(), so a
+# stalled disk slows the scrapers down instead of growing memory unbounded
+WRITE_QUEUE_MAX = 10000
+
+# Database uploads above 8 MiB go up as parallel multipart parts
+UPLOAD_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=8 * 1024 * 1024,
+    max_concurrency=8,
+    use_threads=True,
+)
+
+# Built once per process on first upload; botocore clients are thread-safe
+_s3_client = None
+_s3_client_lock = threading.Lock()
+
+
+def _shared_s3_client():
+    global _s3_client
+    if _s3_client is None:
+        with _s3_client_lock:
+            if _s3_client is None:
+                _s3_client = boto3.client('s3')
+    return _s3_client
+
+
+# Upper bound on (table, manga id) -> latest chapter entries remembered by
+# insert_manga_metadata
+METADATA_CACHE_SIZE = 4096
+
 
 class SQLiteHelper:
-    def __init__(self):
-        self.s3_client = boto3.client('s3')
+    # Shared by every instance: set by any write, cleared when data_to_s3
+    # ships the file, so the uploader can skip rounds with nothing new
+    _dirty = threading.Event()
+    # sha256 of the last snapshot uploaded, to skip re-sending identical bytes
+    _last_upload_digest = None
+
+    # Shared by every instance: the latest chapter each manga is known to
+    # have in the database. Rows only ever move forward, so an incoming
+    # chapter at or below this is a no-op upsert that can be skipped.
+    _latest_cache = OrderedDict()
+    _latest_cache_lock = threading.Lock()
+
+    # Writes are queued as (sql, rows) and applied by one writer thread that
+    # owns the only connection which writes, so callers never wait on the
+    # database lock and never see "database is locked". One queue and writer
+    # per database file, keyed by absolute path
+    _write_queues = {}
+    _writer_threads = {}
+    _writer_lock = threading.Lock()
+
+    # Tables this process has already created and migrated; the CREATE and
+    # migration checks only need to run once per (database, table)
+    _created_tables = set()
+    _created_tables_lock = threading.Lock()
+
+    # Every table name in each database, read from sqlite_master once. Legacy
+    # per-manga page tables are never created any more, so the snapshot stays
+    # accurate and the per-lookup existence check never leaves memory
+    _known_tables = {}
+    _known_tables_lock = threading.Lock()
+
+    def __init__(self, s3_client=None, db_path='otanet_devo.db'):
+        self._s3_client = s3_client   # shared client on first upload if None, see s3_client
         self.bucket_name = 'otanet-manga-devo'
-        self.db_path = 'otanet_devo.db'
-        # Don't create connection in __init__, create per-operation
+        # Resolved once, so every connection opened later - from any thread -
+        # hits the same file even if the working directory changes meanwhile
+        self.db_path = os.path.abspath(db_path)
+        # One connection per thread, opened lazily and kept warm so the
+        # PRAGMAs run once and the statement cache survives between calls
+        self._local = threading.local()
+        self._connections = []   # (thread, connection) for disconnect()
+        self._connections_lock = threading.Lock()
         
+    @property
+    def s3_client(self):
+        # Most helpers only ever read and write the local database; only
+        # the uploader touches S3, and every helper shares one client
+        if self._s3_client is None:
+            self._s3_client = _shared_s3_client()
+        return self._s3_client
+
+    def _connect(self, readonly=False):
+        # Only ever used by the thread that opened it; check_same_thread is
+        # off so disconnect() may close it from elsewhere
+        if readonly:
+            # Per-thread connections only ever read; opening them read-only
+            # makes a stray write fail loudly instead of contending with the
+            # writer thread for the lock
+            database = f"{pathlib.Path(self.db_path).resolve().as_uri()}?mode=ro"
+        else:
+            database = self.db_path
+        conn = sqlite3.connect(database, timeout=30.0, isolation_level=None, uri=readonly,
+                               check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE)
+        conn.executescript(CONNECTION_PRAGMAS)
+        return conn
+
     def _get_connection(self):
-        """Get a new connection for each operation"""
-        conn = sqlite3.connect(self.db_path, timeout=30.0, isolation_level=None)
-        conn.execute('PRAGMA journal_mode=WAL')
+        """This thread's read-only connection, opened on first use"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+        
+        conn = self._connect(readonly=True)
+        self._local.conn = conn
+        
+        with self._connections_lock:
+            # Drop connections left behind by threads that have exited
+            live = []
+            for thread, other in self._connections:
+                if thread.is_alive():
+                    live.append((thread, other))
+                else:
+                    other.close()
+            live.append((threading.current_thread(), conn))
+            self._connections = live
         return conn
     
-    def should_insert(self, cursor):
-        should_insert = True
+    def _cached_latest_chapter(self, table_name, manga_hash):
+        with SQLiteHelper._latest_cache_lock:
+            key = (table_name, manga_hash)
+            latest = SQLiteHelper._latest_cache.get(key)
+            if latest is not None:
+                SQLiteHelper._latest_cache.move_to_end(key)
+            return latest
 
-        if cursor.fetchone()[0] > 0:
-            print("Data exists in Database")
-            should_insert = False
+    def _cache_latest_chapter(self, table_name, manga_hash, latest_chapter):
+        with SQLiteHelper._latest_cache_lock:
+            key = (table_name, manga_hash)
+            known = SQLiteHelper._latest_cache.pop(key, None)
+            SQLiteHelper._latest_cache[key] = latest_chapter if known is None else max(known, latest_chapter)
+            while len(SQLiteHelper._latest_cache) > METADATA_CACHE_SIZE:
+                SQLiteHelper._latest_cache.popitem(last=False)
 
-        return should_insert
+    def _mark_dirty(self):
+        SQLiteHelper._dirty.set()
+
+    def is_dirty(self):
+        """True if anything was written since the last S3 upload"""
+        return SQLiteHelper._dirty.is_set()
+
+    def _enqueue_write(self, sql, rows):
+        """Hand rows for `sql` to the writer thread and return immediately"""
+        write_q = SQLiteHelper._write_queues.get(self.db_path)
+        if write_q is None:
+            with SQLiteHelper._writer_lock:
+                write_q = SQLiteHelper._write_queues.get(self.db_path)
+                if write_q is None:
+                    write_q = queue.Queue(maxsize=WRITE_QUEUE_MAX)
+                    thread = threading.Thread(target=self._writer_loop, args=(write_q,),
+                                              name="sqlite-writer", daemon=True)
+                    thread.start()
+                    SQLiteHelper._writer_threads[self.db_path] = thread
+                    SQLiteHelper._write_queues[self.db_path] = write_q
+        write_q.put((sql, rows))
+
+    def flush(self):
+        """Block until every write queued so far for this database has been committed"""
+        write_q = SQLiteHelper._write_queues.get(self.db_path)
+        if write_q is not None:
+            write_q.join()
+
+    def _writer_loop(self, write_q):
+        # Runs with the helper that first wrote to this database, so
+        # self._connect() opens the same file the queue belongs to
+        conn = self._connect()
+        conn.executescript(WRITER_PRAGMAS)
+        while True:
+            batch = [write_q.get()]
+            deadline = time.monotonic() + WRITE_BATCH_SECONDS
+            while len(batch) < WRITE_BATCH_MAX:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(write_q.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                self._apply_writes(conn, batch)
+            except Exception as e:
+                logger.warning("Error in database writer: %s", e)
+            finally:
+                for _ in batch:
+                    write_q.task_done()
+
+    def _apply_writes(self, conn, batch):
+        changes_before = conn.total_changes
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for sql, rows in batch:
+                conn.executemany(sql, rows)
+            conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.rollback()
+            # Apply the writes one by one so a single bad write doesn't
+            # take the rest of the batch down with it
+            logger.debug("Batch of %s writes failed (%s), retrying individually", len(batch), e)
+            for sql, rows in batch:
+                try:
+                    conn.execute("BEGIN IMMEDIATE")
+                    conn.executemany(sql, rows)
+                    conn.execute("COMMIT")
+                except sqlite3.Error as e:
+                    if conn.in_transaction:
+                        conn.rollback()
+                    logger.warning("Error executing database operation: %s", e)
+        if conn.total_changes > changes_before:
+            self._mark_dirty()
+        logger.debug("Committed %s writes (%s rows changed)", len(batch), conn.total_changes - changes_before)
+
+    def _table_created(self, table_name):
+        with SQLiteHelper._created_tables_lock:
+            return (self.db_path, table_name) in SQLiteHelper._created_tables
+
+    def _remember_table(self, table_name):
+        with SQLiteHelper._created_tables_lock:
+            SQLiteHelper._created_tables.add((self.db_path, table_name))
 
     def create_metadata_table(self, table_name):
         """Create the manga metadata table if it doesn't exist, and migrate any missing columns."""
+        table_name = _table_name(table_name)
+        if self._table_created(table_name):
+            return
+        # Schema changes run once per process on their own writable connection
+        conn = self._connect()
         try:
-            conn = self._get_connection()
             cursor = conn.cursor()
+            # Create, migrate and backfill as one transaction, so a failure
+            # part way leaves the table as it was and the next start retries
+            cursor.execute("BEGIN IMMEDIATE")
             create_table_query = f"""CREATE TABLE IF NOT EXISTS {table_name} (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     title TEXT NOT NULL,
@@ -38,7 +394,9 @@ class SQLiteHelper:
                     tags TEXT,
                     hash TEXT UNIQUE NOT NULL,
                     latest_chapter REAL,
-                    time DATETIME DEFAULT CURRENT_TIMESTAMP
+                    time INTEGER,
+                    last_checked_at INTEGER,
+                    hash_key BLOB
                 );"""
             cursor.execute(create_table_query)
 
@@ -50,71 +408,217 @@ class SQLiteHelper:
                 "description":    "ALTER TABLE {t} ADD COLUMN description TEXT",
                 "tags":           "ALTER TABLE {t} ADD COLUMN tags TEXT",
                 "latest_chapter": "ALTER TABLE {t} ADD COLUMN latest_chapter REAL",
-                "time":           "ALTER TABLE {t} ADD COLUMN time DATETIME DEFAULT CURRENT_TIMESTAMP",
+                "time":           "ALTER TABLE {t} ADD COLUMN time INTEGER",
+                "last_checked_at": "ALTER TABLE {t} ADD COLUMN last_checked_at INTEGER",
+                "hash_key":       "ALTER TABLE {t} ADD COLUMN hash_key BLOB",
             }
             for col, ddl in migrations.items():
                 if col not in existing_columns:
                     cursor.execute(ddl.format(t=table_name))
-                    print(f"[Migration] Added column '{col}' to {table_name}")
+                    logger.info("[Migration] Added column '%s' to %s", col, table_name)
+
+            # Backfill hash_key for rows written before it existed, then index it
+            cursor.execute(f"SELECT rowid, hash FROM {table_name} WHERE hash_key IS NULL AND hash IS NOT NULL")
+            backfill = [(_hash_key(manga_hash), rowid) for rowid, manga_hash in cursor.fetchall()]
+            if backfill:
+                cursor.executemany(f"UPDATE {table_name} SET hash_key = ? WHERE rowid = ?", backfill)
+                logger.info("[Migration] Backfilled hash_key for %s rows in %s", len(backfill), table_name)
+            cursor.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {table_name}_hash_key ON {table_name} (hash_key)")
 
+            # Older rows stored time as ISO text; convert them to unix seconds
+            cursor.execute(f"""
+                UPDATE {table_name} SET time = CAST(strftime('%s', time) AS INTEGER)
+                WHERE typeof(time) = 'text' AND strftime('%s', time) IS NOT NULL
+            """)
+            if cursor.rowcount > 0:
+                logger.info("[Migration] Converted time to unix seconds for %s rows in %s", cursor.rowcount, table_name)
+
+            cursor.execute("COMMIT")
+            self._remember_table(table_name)
+            logger.debug("Table %s created or already exists", table_name)
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.rollback()
+            logger.warning("Error creating table %s: %s", table_name, e)
+        finally:
             conn.close()
-            print(f"Table {table_name} created or already exists")
+
+    def create_page_urls_table(self):
+        """Create the shared page URLs table if it doesn't exist"""
+        if self._table_created(PAGE_URLS_TABLE):
+            return
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            # Migration: the first version of this table kept page_number as
+            # TEXT; column types cannot be altered, so rebuild it
+            column_types = {row[1]: row[2] for row in conn.execute(f"PRAGMA table_info({PAGE_URLS_TABLE})")}
+            if column_types.get("page_number", "INTEGER") != "INTEGER":
+                conn.execute(f"ALTER TABLE {PAGE_URLS_TABLE} RENAME TO {PAGE_URLS_TABLE}_old")
+                conn.execute(CREATE_PAGE_URLS_TABLE)
+                conn.execute(f"INSERT OR IGNORE INTO {PAGE_URLS_TABLE} SELECT * FROM {PAGE_URLS_TABLE}_old")
+                conn.execute(f"DROP TABLE {PAGE_URLS_TABLE}_old")
+                logger.info("[Migration] Rebuilt %s with INTEGER page_number", PAGE_URLS_TABLE)
+            else:
+                conn.execute(CREATE_PAGE_URLS_TABLE)
+            conn.execute("COMMIT")
+            self._remember_table(PAGE_URLS_TABLE)
+            logger.debug("Table %s created or already exists", PAGE_URLS_TABLE)
         except sqlite3.Error as e:
-            print(f"Error creating table {table_name}: {e}")
+            if conn.in_transaction:
+                conn.rollback()
+            logger.warning("Error creating table %s: %s", PAGE_URLS_TABLE, e)
+        finally:
+            conn.close()
 
-    def create_page_urls_table(self, manga_id):
-        """Create a page URLs table for a specific manga using manga_id as the table name"""
-        manga_id = manga_id.replace("-", "_")  # SQLite table names cannot have hyphens
+    def create_download_queue_table(self):
+        """Create the table that persists pending chapter downloads if it doesn't exist"""
+        if self._table_created(DOWNLOAD_QUEUE_TABLE):
+            return
+        conn = self._connect()
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            create_table_query = f"""CREATE TABLE IF NOT EXISTS [{manga_id}] (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    manga_name TEXT NOT NULL,
-                    chapter_num TEXT NOT NULL,
-                    page_number TEXT NOT NULL,
-                    page_url TEXT NOT NULL,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    UNIQUE(chapter_num, page_number)
-                );"""
-            cursor.execute(create_table_query)
+            conn.execute(CREATE_DOWNLOAD_QUEUE_TABLE)
+            self._remember_table(DOWNLOAD_QUEUE_TABLE)
+            logger.debug("Table %s created or already exists", DOWNLOAD_QUEUE_TABLE)
+        except sqlite3.Error as e:
+            logger.warning("Error creating table %s: %s", DOWNLOAD_QUEUE_TABLE, e)
+        finally:
             conn.close()
-            print(f"Table [{manga_id}] created or already exists")
+
+    def migrate_legacy_page_tables(self, metadata_table):
+        """
+        Move rows from the old one-table-per-manga page tables into page_urls
+        and drop them. A legacy table is only migrated when its manga id is
+        known from `metadata_table` (table names lost the id's hyphens);
+        the rest stay and are still read alongside page_urls.
+        Returns the number of tables migrated
+        """
+        metadata_table = _table_name(metadata_table)
+        conn = self._connect()
+        migrated = 0
+        try:
+            id_by_table = {
+                manga_id.replace("-", "_"): manga_id
+                for (manga_id,) in conn.execute(f"SELECT hash FROM {metadata_table} WHERE hash IS NOT NULL")
+            }
+            table_names = [
+                name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")
+                if name in id_by_table
+            ]
+            for legacy_table in table_names:
+                columns = {row[1] for row in conn.execute(f"PRAGMA table_info([{legacy_table}])")}
+                if not {"chapter_num", "page_number", "page_url"} <= columns:
+                    continue
+                try:
+                    conn.execute("BEGIN IMMEDIATE")
+                    conn.execute(f"""
+                        INSERT OR IGNORE INTO {PAGE_URLS_TABLE}
+                            (manga_id, manga_name, chapter_num, page_number, page_url, timestamp)
+                        SELECT ?, COALESCE(manga_name, ''), chapter_num, page_number, page_url,
+                               COALESCE(CAST(strftime('%s', timestamp) AS INTEGER), ?)
+                        FROM [{legacy_table}]
+                        WHERE chapter_num IS NOT NULL AND page_number IS NOT NULL AND page_url IS NOT NULL
+                    """, (id_by_table[legacy_table], int(time.time())))
+                    conn.execute(f"DROP TABLE [{legacy_table}]")
+                    conn.execute("COMMIT")
+                    migrated += 1
+                except sqlite3.Error as e:
+                    if conn.in_transaction:
+                        conn.rollback()
+                    logger.warning("Error migrating page table %s: %s", legacy_table, e)
         except sqlite3.Error as e:
-            print(f"Error creating table [{manga_id}]: {e}")
+            logger.warning("Error migrating legacy page tables: %s", e)
+        finally:
+            conn.close()
+
+        if migrated:
+            self._mark_dirty()
+            # The table-name snapshot still lists the dropped tables
+            with SQLiteHelper._known_tables_lock:
+                SQLiteHelper._known_tables.pop(self.db_path, None)
+            logger.info("[Migration] Moved %s legacy page tables into %s", migrated, PAGE_URLS_TABLE)
+        return migrated
+
+    def _legacy_page_table(self, cursor, manga_id):
+        """Name of this manga's pre-page_urls table, or None if it never had one"""
+        legacy_table = manga_id.replace("-", "_")
+        with SQLiteHelper._known_tables_lock:
+            known = SQLiteHelper._known_tables.get(self.db_path)
+            if known is None:
+                cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
+                known = {row[0] for row in cursor.fetchall()}
+                SQLiteHelper._known_tables[self.db_path] = known
+        return legacy_table if legacy_table in known else None
 
     def get_manga_latest_chapter(self, table_name, manga_hash):
         """
         OPTIMIZATION: Get the latest chapter number for a manga from the database
         Returns None if manga doesn't exist
         """
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                conn = self._get_connection()
-                cursor = conn.cursor()
-                
-                query = f"SELECT MAX(DISTINCT chapter_num) FROM [{table_name}]"
-                cursor.execute(query)
-                result = cursor.fetchone()
-                
-                conn.close()
-                
-                if result:
-                    return float(result[0]) if result[0] else None
-                return None
-                
-            except sqlite3.OperationalError as e:
-                if "database is locked" in str(e) and attempt < max_retries - 1:
-                    print(f"Database locked, retrying... (attempt {attempt + 1}/{max_retries})")
-                    time.sleep(0.1 * (attempt + 1))
-                    continue
-                else:
-                    print(f"Error getting manga latest chapter: {e}")
-                    return None
-            except sqlite3.Error as e:
-                print(f"Error getting manga latest chapter: {e}")
-                return None
+        query = _sql("latest_chapter", table_name)
+        try:
+            conn = self._get_connection()
+            cursor = conn.cursor()
+
+            cursor.execute(query, (_hash_key(manga_hash),))
+            result = cursor.fetchone()
+
+            # Older tables declare latest_chapter NUMERIC, which may hand back an int
+            if result and result[0] is not None:
+                latest_chapter = float(result[0])
+                self._cache_latest_chapter(table_name, manga_hash, latest_chapter)
+                return latest_chapter
+            return None
+        except sqlite3.Error as e:
+            logger.warning("Error getting manga latest chapter: %s", e)
+            return None
+
+    def get_latest_chapters_bulk(self, table_name, manga_hashes):
+        """
+        Latest chapter for many manga in one query per LOOKUP_CHUNK ids.
+        Returns {manga_hash: float or None}; unknown manga map to None
+        """
+        manga_hashes = list(dict.fromkeys(manga_hashes))
+        latest = dict.fromkeys(manga_hashes)
+        try:
+            cursor = self._get_connection().cursor()
+            for start in range(0, len(manga_hashes), LOOKUP_CHUNK):
+                chunk = manga_hashes[start:start + LOOKUP_CHUNK]
+                cursor.execute(_latest_chapters_sql(table_name, len(chunk)), [_hash_key(h) for h in chunk])
+                for manga_hash, latest_chapter in cursor:
+                    if latest_chapter is not None:
+                        latest[manga_hash] = float(latest_chapter)
+        except sqlite3.Error as e:
+            logger.warning("Error getting manga latest chapters: %s", e)
+
+        # What the database already holds seeds the cache, so upserts that
+        # would not move latest_chapter forward are dropped before the queue
+        for manga_hash, latest_chapter in latest.items():
+            if latest_chapter is not None:
+                self._cache_latest_chapter(table_name, manga_hash, latest_chapter)
+        return latest
+
+    def get_manga_last_checked(self, table_name, manga_hash):
+        """
+        Unix timestamp of the last successful chapter-feed check for a manga.
+        Returns None if the manga is unknown or has never been checked
+        """
+        query = _sql("get_last_checked", table_name)
+        try:
+            conn = self._get_connection()
+            cursor = conn.cursor()
+            cursor.execute(query, (_hash_key(manga_hash),))
+            result = cursor.fetchone()
+
+            return result[0] if result else None
+        except sqlite3.Error as e:
+            logger.warning("Error getting manga last checked time: %s", e)
+            return None
+
+    def set_manga_last_checked(self, table_name, manga_hash, checked_at):
+        """Record when a manga's chapter feed was last checked (unix timestamp)"""
+        query = _sql("set_last_checked", table_name)
+        self._enqueue_write(query, [(int(checked_at), _hash_key(manga_hash))])
 
     def get_existing_chapter_pages(self, manga_id, chapter_num):
         """
@@ -122,43 +626,25 @@ class SQLiteHelper:
         Returns empty set if no pages exist
         This allows us to download only missing pages instead of skipping entire chapter
         """
-        manga_id_normalized = manga_id.replace("-", "_")
-        max_retries = 3
-        
-        for attempt in range(max_retries):
-            try:
-                conn = self._get_connection()
-                cursor = conn.cursor()
-                
-                # Check if table exists
-                cursor.execute("""
-                    SELECT name FROM sqlite_master 
-                    WHERE type='table' AND name=?
-                """, (manga_id_normalized,))
-                
-                if not cursor.fetchone():
-                    conn.close()
-                    return set()
-                
-                # Get page numbers for this specific chapter
-                query = f"SELECT page_number FROM [{manga_id_normalized}] WHERE chapter_num = ?"
-                cursor.execute(query, (str(chapter_num),))
-                pages = {row[0] for row in cursor.fetchall()}
-                
-                conn.close()
-                return pages
-                
-            except sqlite3.OperationalError as e:
-                if "database is locked" in str(e) and attempt < max_retries - 1:
-                    print(f"Database locked, retrying... (attempt {attempt + 1}/{max_retries})")
-                    time.sleep(0.1 * (attempt + 1))
-                    continue
-                else:
-                    print(f"Error getting existing chapter pages: {e}")
-                    return set()
-            except sqlite3.Error as e:
-                print(f"Error getting existing chapter pages: {e}")
-                return set()
+        try:
+            conn = self._get_connection()
+            cursor = conn.cursor()
+
+            legacy_table = self._legacy_page_table(cursor, manga_id)
+
+            # Get page numbers for this specific chapter, streamed straight
+            # from the cursor into the set
+            cursor.execute(SELECT_CHAPTER_PAGES, (manga_id, str(chapter_num)))
+            pages = {row[0] for row in cursor}
+
+            if legacy_table:
+                cursor.execute(_sql("legacy_chapter_pages", legacy_table), (str(chapter_num),))
+                pages.update(row[0] for row in cursor)
+
+            return pages
+        except sqlite3.Error as e:
+            logger.warning("Error getting existing chapter pages: %s", e)
+            return set()
 
     def get_chapters_with_status(self, manga_id):
         """
@@ -171,181 +657,177 @@ class SQLiteHelper:
             }
         }
         """
-        manga_id_normalized = manga_id.replace("-", "_")
-        max_retries = 3
-        
-        for attempt in range(max_retries):
-            try:
-                conn = self._get_connection()
-                cursor = conn.cursor()
-                
-                # Check if table exists
-                cursor.execute("""
-                    SELECT name FROM sqlite_master 
-                    WHERE type='table' AND name=?
-                """, (manga_id_normalized,))
-                
-                if not cursor.fetchone():
-                    conn.close()
-                    return {}
-                
-                # Get all chapters with their pages
-                query = f"""
-                    SELECT chapter_num, page_number 
-                    FROM [{manga_id_normalized}]
-                    ORDER BY chapter_num, page_number
-                """
-                cursor.execute(query)
-                
-                chapters = {}
-                for row in cursor.fetchall():
-                    chapter_num = row[0]
-                    page_number = row[1]
-                    
-                    if chapter_num not in chapters:
-                        chapters[chapter_num] = {
-                            'page_count': 0,
-                            'pages': set()
-                        }
-                    
-                    chapters[chapter_num]['pages'].add(page_number)
-                    chapters[chapter_num]['page_count'] += 1
-                
-                conn.close()
-                return chapters
-                
-            except sqlite3.OperationalError as e:
-                if "database is locked" in str(e) and attempt < max_retries - 1:
-                    print(f"Database locked, retrying... (attempt {attempt + 1}/{max_retries})")
-                    time.sleep(0.1 * (attempt + 1))
-                    continue
-                else:
-                    print(f"Error getting chapters with status: {e}")
-                    return {}
-            except sqlite3.Error as e:
-                print(f"Error getting chapters with status: {e}")
-                return {}
-
-    def insert_manga_metadata(self, table_name, manga):
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                conn = self._get_connection()
-                cursor = conn.cursor()
-                
-                check_hash_query = f"SELECT COUNT(*) FROM {table_name} WHERE hash = ?"
-                cursor.execute(check_hash_query, (manga.get_id(),))
-                
-                if cursor.fetchone()[0] > 0:
-                    should_insert = False
-                else:
-                    should_insert = True
-
-                if should_insert:
-                    insert_metadata_query = f"""INSERT INTO {table_name} (title, description, tags, hash, latest_chapter, cover_img, time) 
-                        VALUES (?,?,?,?,?,?,?);"""
-
-                    insert_data = (
-                        manga.get_title(), 
-                        manga.get_description(),
-                        str(manga.get_tags()),
-                        manga.get_id(),
-                        manga.get_latest_chapter(),
-                        manga.get_cover_img(),
-                        datetime.now().isoformat())
-                    
-                    if manga.get_latest_chapter() == 0:
-                        conn.close()
-                        return
-                    
-                    print("Query: ", insert_metadata_query, insert_data)
-                    cursor.execute(insert_metadata_query, insert_data)
-                    print(f"Data inserted successfully: {manga.get_id()}")
-                else:
-                    check_latest_chapter = f"SELECT latest_chapter FROM {table_name} WHERE hash = ?"
-                    cursor.execute(check_latest_chapter, (manga.get_id(),))
-                    result = cursor.fetchone()
-                    if result and float(result[0]) < float(manga.get_latest_chapter()):
-                        update_latest_chapter_query = f"""
-                            UPDATE {table_name}
-                            SET latest_chapter = ?,
-                                cover_img = ?,
-                                time = ?
-                            WHERE hash = ?;"""
-                        print("Query: ", update_latest_chapter_query)
-                        cursor.execute(update_latest_chapter_query, 
-                                     (manga.get_latest_chapter(), manga.get_cover_img(), 
-                                      datetime.now().isoformat(), manga.get_id()))
-                        print(f"Successfully updated latest chapter for: {manga.get_id()}")
-                
-                conn.close()
-                break
-                
-            except sqlite3.OperationalError as e:
-                if "database is locked" in str(e) and attempt < max_retries - 1:
-                    print(f"Database locked, retrying... (attempt {attempt + 1}/{max_retries})")
-                    time.sleep(0.1 * (attempt + 1))
+        try:
+            conn = self._get_connection()
+            cursor = conn.cursor()
+
+            queries = [(SELECT_MANGA_PAGES, (manga_id,))]
+            legacy_table = self._legacy_page_table(cursor, manga_id)
+            if legacy_table:
+                queries.append((_sql("legacy_all_pages", legacy_table), ()))
+
+            # Get all chapters with their pages in one pass over each cursor;
+            # a page in both tables lands in its set once
+            pages_by_chapter = {}
+            for query, params in queries:
+                for chapter_num, page_number in cursor.execute(query, params):
+                    pages = pages_by_chapter.get(chapter_num)
+                    if pages is None:
+                        pages = pages_by_chapter[chapter_num] = set()
+                    pages.add(page_number)
+
+            return {
+                chapter_num: {
+                    'page_count': len(pages),
+                    'pages': pages
+                }
+                for chapter_num, pages in pages_by_chapter.items()
+            }
+        except sqlite3.Error as e:
+            logger.warning("Error getting chapters with status: %s", e)
+            return {}
+
+    def insert_manga_metadata(self, table_name, manga, use_cache=True):
+        self.insert_many_manga_metadata(table_name, [manga], use_cache)
+
+    def insert_many_manga_metadata(self, table_name, mangas, use_cache=True):
+        """
+        Upsert metadata for many manga as one executemany, committed in a
+        single transaction. Returns the number of rows queued
+        """
+        now = int(time.time())
+        upsert_rows = []
+        queued = []
+        for manga in mangas:
+            latest_chapter = manga.get_latest_chapter()
+            if latest_chapter == 0:
+                continue
+            
+            if use_cache:
+                known = self._cached_latest_chapter(table_name, manga.get_id())
+                if known is not None and float(latest_chapter) <= known:
                     continue
-                else:
-                    print(f"Error executing database operation: {e}")
-                    raise
-            except sqlite3.Error as e:
-                print(f"Error executing database operation: {e}")
-                raise
+            
+            upsert_rows.append((
+                manga.get_title(), 
+                manga.get_description(),
+                str(manga.get_tags()),
+                manga.get_id(),
+                _hash_key(manga.get_id()),
+                latest_chapter,
+                manga.get_cover_img(),
+                now))
+            queued.append((manga.get_id(), float(latest_chapter)))
+        
+        if not upsert_rows:
+            return 0
+        
+        # New manga are inserted; known ones only move forward, taking
+        # the newer latest_chapter, cover and timestamp
+        self._enqueue_write(_sql("upsert_metadata", table_name), upsert_rows)
+        
+        # Once written each row holds at least this chapter
+        for manga_id, latest_chapter in queued:
+            self._cache_latest_chapter(table_name, manga_id, latest_chapter)
+        return len(upsert_rows)
+
+    @staticmethod
+    def _file_digest(path):
+        sha = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                sha.update(block)
+        return sha.hexdigest()
 
     def data_to_s3(self):
-        """Upload database to S3"""
+        """Upload a consistent snapshot of the database to S3"""
+        # Queued writes belong in this upload
+        self.flush()
+        if not self.is_dirty():
+            logger.debug("Database unchanged since the last upload, skipping S3 upload")
+            return
+        # Cleared up front so a write landing mid-upload marks the file again
+        SQLiteHelper._dirty.clear()
+        snapshot_path = f"{self.db_path}.snapshot"
         try:
-            self.s3_client.upload_file(self.db_path, self.bucket_name, "database/otanet_devo.db")
-            print("Database uploaded to S3 successfully")
+            # The online backup copies a single point-in-time image, WAL
+            # included, while the writer keeps going; the live file could be
+            # mid-commit when read directly
+            snapshot = sqlite3.connect(snapshot_path)
+            try:
+                self._get_connection().backup(snapshot)
+            finally:
+                snapshot.close()
+            digest = self._file_digest(snapshot_path)
+            if digest == SQLiteHelper._last_upload_digest:
+                logger.debug("Database snapshot identical to the last upload, skipping S3 upload")
+                return
+            self.s3_client.upload_file(snapshot_path, self.bucket_name, "database/otanet_devo.db",
+                                       Config=UPLOAD_TRANSFER_CONFIG)
+            SQLiteHelper._last_upload_digest = digest
+            logger.debug("Database uploaded to S3 successfully")
         except Exception as e:
-            print(f"Error uploading to S3: {e}")
+            SQLiteHelper._dirty.set()
+            logger.warning("Error uploading to S3: %s", e)
+        finally:
+            if os.path.exists(snapshot_path):
+                os.remove(snapshot_path)
+
+    def enqueue_download(self, manga_id, source, payload):
+        """Persist a pending download; payload is the manga's params as JSON"""
+        self._enqueue_write(ENQUEUE_DOWNLOAD, [(manga_id, source, payload, int(time.time()))])
+
+    def count_download_attempt(self, manga_id):
+        self._enqueue_write(COUNT_DOWNLOAD_ATTEMPT, [(manga_id,)])
+
+    def finish_download(self, manga_id):
+        self._enqueue_write(FINISH_DOWNLOAD, [(manga_id,)])
+
+    def get_pending_downloads(self):
+        """(manga_id, source, payload, attempts) for every persisted download, oldest first"""
+        try:
+            return self._get_connection().execute(SELECT_PENDING_DOWNLOADS).fetchall()
+        except sqlite3.Error as e:
+            logger.warning("Error getting pending downloads: %s", e)
+            return []
 
     def store_page_url(self, manga_id, manga_name, chapter_num, page_number, page_url):
-        """Store page URL information to the manga-specific table"""
-        manga_id = manga_id.replace("-", "_")
-        
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                conn = self._get_connection()
-                cursor = conn.cursor()
-                
-                # Simplified insert with UNIQUE constraint handling
-                insert_page_query = f"""INSERT OR IGNORE INTO [{manga_id}] 
-                    (manga_name, chapter_num, page_number, page_url, timestamp)
-                    VALUES (?, ?, ?, ?, ?);"""
-                    
-                insert_data = (
-                    str(manga_name), 
-                    str(chapter_num), 
-                    str(page_number), 
-                    str(page_url), 
-                    datetime.now().isoformat()
-                )
-                
-                cursor.execute(insert_page_query, insert_data)
-                
-                if cursor.rowcount > 0:
-                    print(f"Page URL stored successfully in table [{manga_id}]: {manga_name} - Chapter {chapter_num} - Page {page_number}")
-                else:
-                    print(f"Page URL already exists in table [{manga_id}]: {manga_name} - Chapter {chapter_num} - Page {page_number}")
-                
-                conn.close()
-                break
-                
-            except sqlite3.OperationalError as e:
-                if "database is locked" in str(e) and attempt < max_retries - 1:
-                    print(f"Database locked, retrying... (attempt {attempt + 1}/{max_retries})")
-                    time.sleep(0.1 * (attempt + 1))
-                    continue
-                else:
-                    print(f"Error storing page URL to database: {e}")
-                    raise
-            except sqlite3.Error as e:
-                print(f"Error storing page URL to database: {e}")
-                raise
+        """Store a single page URL; prefer store_page_urls_bulk for a whole chapter"""
+        return self.store_page_urls_bulk(manga_id, manga_name, chapter_num, [(page_number, page_url)])
+
+    def store_page_urls_bulk(self, manga_id, manga_name, chapter_num, pages):
+        """
+        Queue many (page_number, page_url) pairs for one chapter; they are
+        committed together in the writer's next batch. Returns the number of
+        pages queued
+        """
+        timestamp = int(time.time())
+        rows = [
+            (manga_id, str(manga_name), str(chapter_num), str(page_number), str(page_url), timestamp)
+            for page_number, page_url in pages
+        ]
+        if rows:
+            for start in range(0, len(rows), PAGE_INSERT_ROWS):
+                chunk = rows[start:start + PAGE_INSERT_ROWS]
+                params = tuple(itertools.chain.from_iterable(chunk))
+                self._enqueue_write(_insert_page_urls_sql(len(chunk)), [params])
+            logger.debug("Queued %s page URLs for %s: %s - Chapter %s", len(rows), manga_id, manga_name, chapter_num)
+        return len(rows)
+
+    def close(self):
+        """Close the calling thread's connection; call as a worker thread exits"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            return
+        self._local.conn = None
+        with self._connections_lock:
+            self._connections = [(thread, other) for thread, other in self._connections if other is not conn]
+        conn.close()
 
     def disconnect(self):
-        # No persistent connection to close
-        pass
\ No newline at end of file
+        """Close every connection this helper has opened; call at shutdown"""
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for _, conn in connections:
+            conn.close()
+        self._local = threading.local()
\ No newline at end of file
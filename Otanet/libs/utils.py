@@ -3,35 +3,46 @@ import re
 import string
 import shutil
 
+# Compiled once; these run on every title, description, tag and S3 key
+_DB_TEXT_RE = re.compile(r'[^a-zA-Z0-9\s' + re.escape(string.punctuation) + ']')
+_S3_KEEP_RE = re.compile(r"[^a-z0-9 ]")
+_S3_SPACE_RE = re.compile(r"\s+")
+_FIRST_NUM_RE = re.compile(r'\d+')
+# Plain decimal numbers float() accepts; checked without raising on the
+# non-numeric chapter labels that are common in feeds
+_FLOAT_RE = re.compile(r'^[+-]?(\d+(\.\d*)?|\.\d+)([eE][+-]?\d+)?$')
+
 class Utils:
-    def normalize_database_text(self, text):
-        pattern = r'[^a-zA-Z0-9\s' + re.escape(string.punctuation) + ']'
-        text = re.sub(pattern, '', text)
-        return text
+    @staticmethod
+    def normalize_database_text(text):
+        return _DB_TEXT_RE.sub('', text)
     
-    def normalize_s3_text(self, text):
+    @staticmethod
+    def normalize_s3_text(text):
         text = text.lower().strip()
-        text = re.sub(r"[^a-z0-9 ]", "", text)
-        text = re.sub(r"\s+", "-", text)
+        text = _S3_KEEP_RE.sub("", text)
+        text = _S3_SPACE_RE.sub("-", text)
         return text
     
-    def is_float(self, input):
-        try:
-            float(input)
-            return True
-        except:
+    @staticmethod
+    def is_float(input):
+        if input is None:
             return False
+        return _FLOAT_RE.match(str(input).strip()) is not None
     
-    def get_first_number(self, input):
-                match = re.search(r'\d+', input)
-                if match:
-                    return int(match.group(0))
-                return 0
+    @staticmethod
+    def get_first_number(input):
+        match = _FIRST_NUM_RE.search(input)
+        if match:
+            return int(match.group(0))
+        return 0
     
     def create_tmp_dir(self, path):
-        os.makedirs('tmp', exist_ok=True) 
-        os.chdir("/tmp/")
-        os.makedirs(path, exist_ok=True)
+        # Absolute path instead of chdir: the working directory is shared by
+        # every thread in the process
+        tmp_path = os.path.join("/tmp", path)
+        os.makedirs(tmp_path, exist_ok=True)
+        return tmp_path
 
     def clear_chapter_dir(self, path):
          shutil.rmtree(path, ignore_errors=True)
\ No newline at end of file
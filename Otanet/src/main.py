@@ -1,30 +1,90 @@
 import os
 import sys
+import json
 import time
-import threading
-from queue import Queue
-from threading import Thread, Lock
 import random
+import logging
+import itertools
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from queue import Queue, Empty, Full
+from threading import Thread
+from concurrent.futures import ThreadPoolExecutor
+from requests import HTTPError
 
-path = os.getcwd()
-parent_dir = os.path.abspath(os.path.join(path, os.pardir))
+# Resolved from this file rather than the working directory, so the script
+# can be started from anywhere
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 ###### Import Libraries ######
-sys.path.insert(0, f'{parent_dir}//libs')
+sys.path.insert(0, os.path.join(parent_dir, 'libs'))
 from mangadex_helper import MangaDexHelper
 from asura_helper import AsuraComicHelper
 from manga_factory import MangaFactory
 from sqlite_helper import SQLiteHelper
 from metrics_collector import MetricsCollector
+from rate_limiter import RateLimiter
 from dashboard import run_dashboard
 ##################################
 
+logger = logging.getLogger(__name__)
+
 # ─────────────────────────────────────────────────────────────────────────────
 # Global tracking for concurrent manga processing
 # ─────────────────────────────────────────────────────────────────────────────
 
-processing_manga = set()
-processing_lock  = Lock()
+# manga_id -> ident of the worker thread processing it. dict.setdefault and pop are
+# single atomic operations under the GIL, so claiming a manga takes no lock.
+processing_manga = {}
+# Claim held by a manga sitting in a download queue (thread idents are never 0)
+DOWNLOAD_PENDING = 0
+
+# One bucket per site, shared by all of its workers: list fetches only wait
+# when the site's budget is actually used up
+mangadex_limiter = RateLimiter(rate=5, per=1.0)
+asura_limiter    = RateLimiter(rate=1, per=2.0)
+
+# Status codes each site answers with when it wants us to back off
+MANGADEX_RATE_LIMIT_CODES = frozenset({429, 403})
+ASURA_RATE_LIMIT_CODES    = frozenset({429})
+
+# Worker back-off after a failed offset: doubles per consecutive failure,
+# starting higher for rate limits, and never longer than BACKOFF_MAX
+ERROR_BACKOFF_BASE      = 5
+RATE_LIMIT_BACKOFF_BASE = 60
+BACKOFF_MAX             = 10 * 60
+
+# Downloads a failing manga gets before it is dropped from the queue
+MAX_DOWNLOAD_ATTEMPTS = 3
+
+# Threads checking list-page manga for new chapters. One pool serves every
+# source worker for the life of the process, so its threads keep their
+# database connection and metrics shard instead of a fresh set per page.
+CHECK_WORKERS = 16
+check_pool = ThreadPoolExecutor(max_workers=CHECK_WORKERS, thread_name_prefix="check")
+
+# Set by a worker each time it finishes an offset, so the main loop can top
+# the queues up straight away instead of waiting out a fixed sleep
+batch_done = threading.Event()
+
+
+def _is_rate_limited(exc, codes):
+    """True if exc is an HTTP error whose status is one of codes"""
+    return (isinstance(exc, HTTPError) and exc.response is not None
+            and exc.response.status_code in codes)
+
+
+def _backoff_seconds(exc, failures, base):
+    """
+    Seconds to wait after the failures-th consecutive failure: the server's
+    Retry-After when exc carries one, otherwise exponential with jitter
+    """
+    response = getattr(exc, "response", None)
+    if response is not None:
+        retry_after = response.headers.get("Retry-After")
+        if retry_after and retry_after.isdigit():
+            return min(BACKOFF_MAX, int(retry_after))
+    return min(BACKOFF_MAX, base * 2 ** failures + random.uniform(0, 1))
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -33,149 +93,218 @@ processing_lock  = Lock()
 # difference is the helper instance that is passed in.
 # ─────────────────────────────────────────────────────────────────────────────
 
-def _process_manga_list(manga_list, helper, sqlite_helper, metrics, worker_label, s3_upload_queue):
-    """Shared inner loop: process a list of manga dicts from any source."""
-    for manga in manga_list:
-        try:
-            manga_obj = MangaFactory(manga)
-            manga_id  = manga_obj.get_id()
+def _check_manga(manga, owner, helper, existing_chapters, metrics, worker_label):
+    """
+    Claim one manga and ask its source whether it has new chapters.
+    Returns the MangaFactory, still claimed, when there is something to
+    download; otherwise releases the claim and returns None.
+    """
+    try:
+        manga_obj = MangaFactory(manga)
+        manga_id  = manga_obj.get_id()
+    except Exception as exc:
+        metrics.record_error("api_errors")
+        logger.warning("[%s] Error processing manga: %s", worker_label, exc)
+        return None
 
-            with processing_lock:
-                if manga_id in processing_manga:
-                    continue
-                processing_manga.add(manga_id)
+    if processing_manga.setdefault(manga_id, owner) != owner:
+        return None
 
-            try:
-                existing_chapter = sqlite_helper.get_manga_latest_chapter(
-                    "manga_metadata", manga_obj.get_id()
-                )
-                is_new_manga    = existing_chapter is None
-                should_download = helper.set_latest_chapters(manga_obj)
-
-                metrics.record_manga_processed(
-                    worker_id=worker_label,
-                    manga_title=manga_obj.get_title(),
-                    is_new=is_new_manga,
-                    has_new_chapters=should_download,
-                )
-
-                if should_download:
-                    sqlite_helper.insert_manga_metadata("manga_metadata", manga_obj)
-                    helper.download_chapters(manga_obj)
-                    s3_upload_queue.put(True)
-                else:
-                    print(f"[{worker_label}] No new chapters for '{manga_obj.get_title()}'")
-            finally:
-                with processing_lock:
-                    processing_manga.discard(manga_id)
+    try:
+        title            = manga_obj.get_title()
+        existing_chapter = existing_chapters.get(manga_id)
+        is_new_manga    = existing_chapter is None
+        should_download = helper.set_latest_chapters(manga_obj)
+
+        metrics.record_manga_processed(
+            worker_id=worker_label,
+            manga_title=title,
+            is_new=is_new_manga,
+            has_new_chapters=should_download,
+        )
+
+        if should_download:
+            return manga_obj
+        logger.info("[%s] No new chapters for '%s'", worker_label, title)
+    except Exception as exc:
+        metrics.record_error("api_errors")
+        logger.warning("[%s] Error processing manga: %s", worker_label, exc)
+
+    processing_manga.pop(manga_id, None)
+    return None
 
-        except Exception as exc:
-            metrics.record_error("api_errors")
-            print(f"[{worker_label}] Error processing manga: {exc}")
+
+def _manga_payload(manga_obj):
+    """The MangaFactory params of manga_obj as JSON, to persist a queued download"""
+    return json.dumps({
+        "id":          manga_obj.get_id(),
+        "title":       manga_obj.get_title(),
+        "description": manga_obj.get_description(),
+        "tags":        manga_obj.get_tags(),
+        "cover_img":   manga_obj.get_cover_img(),
+    })
+
+
+def _process_manga_list(manga_list, helper, sqlite_helper, metrics, worker_label,
+                        source, download_queue):
+    """Shared inner loop: process a list of manga dicts from any source."""
+    # One lookup for the whole page instead of one query per manga
+    existing_chapters = sqlite_helper.get_latest_chapters_bulk(
+        "manga_metadata", [manga["id"] for manga in manga_list if "id" in manga]
+    )
+
+    # Checking for new chapters is a round trip per manga, so the whole page
+    # is checked at once; claims are made on behalf of this worker thread
+    owner = threading.get_ident()
+    checked = check_pool.map(
+        lambda manga: _check_manga(manga, owner, helper, existing_chapters, metrics, worker_label),
+        manga_list,
+    )
+    updated_mangas = [manga_obj for manga_obj in checked if manga_obj is not None]
+
+    if not updated_mangas:
+        return
+
+    # Metadata for the whole page goes to the database as one batch
+    sqlite_helper.insert_many_manga_metadata("manga_metadata", updated_mangas)
+
+    # Downloads run on the source's download workers; the claim moves with
+    # the manga and is released once it has been downloaded
+    for manga_obj in updated_mangas:
+        processing_manga[manga_obj.get_id()] = DOWNLOAD_PENDING
+        sqlite_helper.enqueue_download(manga_obj.get_id(), source, _manga_payload(manga_obj))
+        download_queue.put((manga_obj, False, 0))
 
 
 # ─────────────────────────────────────────────────────────────────────────────
-# MangaDex worker
+# Source worker
+# MangaDex and AsuraComic workers run the same loop; they differ only in the
+# helper they build, the site's rate limiter and the codes that mean "back
+# off". Both use plain requests – no browser, safe to run multiple threads.
+# They only poll and check; downloads are handed to the download workers.
 # ─────────────────────────────────────────────────────────────────────────────
 
-def mangadex_worker(worker_id, offset_queue, s3_upload_queue):
-    helper        = MangaDexHelper()
+def source_worker(helper_cls, label, limiter, rate_limit_codes,
+                  offset_queue, source, download_queue, metrics):
+    helper        = helper_cls()
     sqlite_helper = SQLiteHelper()
-    metrics       = MetricsCollector()
-    label         = f"Worker MD-{worker_id}"
 
-    print(f"[{label}] Started")
+    logger.info("[%s] Started", label)
 
+    failures = 0   # consecutive failed offsets, for the back-off
     while True:
         try:
             offset = offset_queue.get()
-            time.sleep(random.uniform(1, 8.0))
 
             if offset is None:
                 offset_queue.task_done()
                 break
 
-            print(f"[{label}] Processing offset {offset}")
+            logger.info("[%s] Processing offset %s", label, offset)
 
             try:
+                limiter.acquire()
                 manga_list = helper.get_recent_manga(offset)
                 metrics.record_api_call("manga_list")
             except Exception as exc:
+                if _is_rate_limited(exc, rate_limit_codes):
+                    raise
                 metrics.record_error("api_errors")
-                print(f"[{label}] Error fetching list: {exc}")
+                logger.warning("[%s] Error fetching list: %s", label, exc)
+                offset_queue.task_done()
+                batch_done.set()
+                continue
+
+            if manga_list is None:
+                logger.info("[%s] Offset %s unchanged since last fetch", label, offset)
                 offset_queue.task_done()
+                batch_done.set()
                 continue
 
-            _process_manga_list(manga_list, helper, sqlite_helper, metrics, label, s3_upload_queue)
+            _process_manga_list(manga_list, helper, sqlite_helper, metrics, label, source, download_queue)
+            failures = 0
             offset_queue.task_done()
+            batch_done.set()
 
         except Exception as exc:
-            if "429" in str(exc) or "403" in str(exc):
-                print(f"[{label}] Rate limited – sleeping 60s")
+            if _is_rate_limited(exc, rate_limit_codes):
+                wait = _backoff_seconds(exc, failures, RATE_LIMIT_BACKOFF_BASE)
+                logger.warning("[%s] Rate limited – sleeping %.0fs", label, wait)
                 metrics.record_error("rate_limits")
-                time.sleep(60)
+                # The page was never processed; hand it back rather than skip it
+                offset_queue.put(offset)
             else:
-                print(f"[{label}] Error: {exc}")
+                wait = _backoff_seconds(exc, failures, ERROR_BACKOFF_BASE)
+                logger.warning("[%s] Error: %s", label, exc)
                 metrics.record_error("api_errors")
-                time.sleep(5)
+            failures += 1
+            time.sleep(wait)
             offset_queue.task_done()
+            batch_done.set()
+
+    sqlite_helper.close()
 
 
 # ─────────────────────────────────────────────────────────────────────────────
-# AsuraComic worker
-# Uses plain requests – no browser, no lock, safe to run multiple threads.
+# Download worker
+# Takes (manga, needs_check, attempts) from its source's download queue, so a
+# long download never holds up the next list poll. Manga restored from the
+# database after a restart have no chapters attached and are checked first.
 # ─────────────────────────────────────────────────────────────────────────────
 
-def asura_worker(worker_id, offset_queue, s3_upload_queue):
-    helper        = AsuraComicHelper()
+def download_worker(helper_cls, label, download_queue, s3_upload_queue, metrics):
+    helper        = helper_cls()
     sqlite_helper = SQLiteHelper()
-    metrics       = MetricsCollector()
-    label         = f"Worker AS-{worker_id}"
 
-    print(f"[{label}] Started")
+    logger.info("[%s] Started", label)
 
     while True:
+        item = download_queue.get()
+        if item is None:
+            download_queue.task_done()
+            break
+
+        manga_obj, needs_check, attempts = item
+        manga_id = manga_obj.get_id()
+        requeued = False
         try:
-            offset = offset_queue.get()
-            time.sleep(random.uniform(1, 5.0))
-
-            if offset is None:
-                offset_queue.task_done()
-                break
-
-            print(f"[{label}] Processing offset {offset}")
-
-            try:
-                manga_list = helper.get_recent_manga(offset)
-                metrics.record_api_call("manga_list")
-            except Exception as exc:
-                metrics.record_error("api_errors")
-                print(f"[{label}] Error fetching list: {exc}")
-                offset_queue.task_done()
-                continue
-
-            _process_manga_list(manga_list, helper, sqlite_helper, metrics, label, s3_upload_queue)
-            offset_queue.task_done()
+            sqlite_helper.count_download_attempt(manga_id)
+            if needs_check and not helper.set_latest_chapters(manga_obj, force=True):
+                logger.info("[%s] Nothing to download for '%s'", label, manga_obj.get_title())
+            else:
+                helper.download_chapters(manga_obj)
+                s3_upload_queue.put(True)
+            sqlite_helper.finish_download(manga_id)
 
         except Exception as exc:
-            if "429" in str(exc):
-                print(f"[{label}] Rate limited – sleeping 60s")
-                metrics.record_error("rate_limits")
-                time.sleep(60)
+            metrics.record_error("api_errors")
+            logger.warning("[%s] Error downloading '%s': %s", label, manga_obj.get_title(), exc)
+            if attempts + 1 < MAX_DOWNLOAD_ATTEMPTS:
+                # Never block here: every download worker could be waiting
+                # on a full queue. A manga that does not fit stays in the
+                # database and is picked up on the next start.
+                try:
+                    download_queue.put_nowait((manga_obj, needs_check, attempts + 1))
+                    requeued = True
+                except Full:
+                    pass
             else:
-                print(f"[{label}] Error: {exc}")
-                metrics.record_error("api_errors")
-                time.sleep(5)
-            offset_queue.task_done()
+                sqlite_helper.finish_download(manga_id)
+
+        finally:
+            if not requeued:
+                processing_manga.pop(manga_id, None)
+            download_queue.task_done()
+
+    sqlite_helper.close()
 
 
 # ─────────────────────────────────────────────────────────────────────────────
 # S3 upload thread
 # ─────────────────────────────────────────────────────────────────────────────
 
-def s3_upload_thread(s3_upload_queue):
+def s3_upload_thread(s3_upload_queue, metrics):
     sqlite_helper    = SQLiteHelper()
-    metrics          = MetricsCollector()
     upload_count     = 0
     last_upload_time = time.time()
 
@@ -184,26 +313,35 @@ def s3_upload_thread(s3_upload_queue):
             try:
                 s3_upload_queue.get(timeout=60)
                 upload_count += 1
-            except Exception:
+                # Take the rest of a burst in the same wake-up
+                while True:
+                    s3_upload_queue.get_nowait()
+                    upload_count += 1
+            except Empty:
                 pass
 
             current_time = time.time()
             time_elapsed = current_time - last_upload_time
 
+            # Nothing written since the last upload: nothing to ship
+            if not sqlite_helper.is_dirty():
+                upload_count = 0
+                continue
+
             if upload_count >= 10 or time_elapsed >= 300:
-                print(f"[S3 Upload] Uploading DB "
-                      f"(count={upload_count}, elapsed={time_elapsed:.0f}s)")
+                logger.info("[S3 Upload] Uploading DB (count=%s, elapsed=%.0fs)",
+                            upload_count, time_elapsed)
                 try:
                     sqlite_helper.data_to_s3()
                     metrics.record_s3_upload()
                     upload_count     = 0
                     last_upload_time = current_time
                 except Exception as exc:
-                    print(f"[S3 Upload] Error: {exc}")
+                    logger.warning("[S3 Upload] Error: %s", exc)
                     metrics.record_error("api_errors")
 
         except Exception as exc:
-            print(f"[S3 Upload] Error: {exc}")
+            logger.warning("[S3 Upload] Error: %s", exc)
             time.sleep(5)
 
 
@@ -211,7 +349,22 @@ def s3_upload_thread(s3_upload_queue):
 # Entrypoint
 # ─────────────────────────────────────────────────────────────────────────────
 
-root_dir = os.getcwd()
+# Everything logs through `logging`: worker progress is INFO, hot-path
+# detail in the libraries is DEBUG and only surfaces when OTANET_LOG_LEVEL
+# asks for it. Worker threads only enqueue records; a single listener
+# thread formats and writes them, so no scraper thread ever waits on a
+# write() to stderr.
+log_handler = logging.StreamHandler()
+log_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s [%(name)s] %(message)s"))
+log_queue    = Queue()
+log_listener = QueueListener(log_queue, log_handler)
+logging.basicConfig(
+    level=os.getenv("OTANET_LOG_LEVEL", "INFO").upper(),
+    handlers=[QueueHandler(log_queue)],
+)
+# Flask logs every dashboard poll at INFO
+logging.getLogger("werkzeug").setLevel(logging.WARNING)
+log_listener.start()
 
 print("Initialising metrics collector...")
 metrics = MetricsCollector()
@@ -222,14 +375,26 @@ print("Dashboard available at http://localhost:5000")
 
 sqlite_helper = SQLiteHelper()
 sqlite_helper.create_metadata_table("manga_metadata")
+sqlite_helper.create_page_urls_table()
+sqlite_helper.migrate_legacy_page_tables("manga_metadata")
+sqlite_helper.create_download_queue_table()
 
 # ── Queues ────────────────────────────────────────────────────────────────────
-mangadex_queue  = Queue()
-asura_queue     = Queue()
-s3_upload_queue = Queue()
+# Bounded so that a stalled upload makes downloaders wait instead of piling
+# up upload signals
+S3_UPLOAD_QUEUE_MAX = 100
+# Manga waiting on a download worker; a full queue holds the list pollers
+# back until downloads catch up
+DOWNLOAD_QUEUE_MAX  = 500
+mangadex_queue     = Queue()
+asura_queue        = Queue()
+s3_upload_queue    = Queue(maxsize=S3_UPLOAD_QUEUE_MAX)
+mangadex_downloads = Queue(maxsize=DOWNLOAD_QUEUE_MAX)
+asura_downloads    = Queue(maxsize=DOWNLOAD_QUEUE_MAX)
+download_queues    = {"mangadex": mangadex_downloads, "asura": asura_downloads}
 
 # ── S3 upload thread ──────────────────────────────────────────────────────────
-s3_thread = Thread(target=s3_upload_thread, args=(s3_upload_queue,))
+s3_thread = Thread(target=s3_upload_thread, args=(s3_upload_queue, metrics))
 s3_thread.daemon = True
 s3_thread.start()
 print("Started S3 upload thread")
@@ -238,7 +403,9 @@ print("Started S3 upload thread")
 MANGADEX_WORKERS = 4
 mangadex_threads = []
 for i in range(MANGADEX_WORKERS):
-    t = Thread(target=mangadex_worker, args=(i, mangadex_queue, s3_upload_queue))
+    t = Thread(target=source_worker,
+               args=(MangaDexHelper, f"Worker MD-{i}", mangadex_limiter, MANGADEX_RATE_LIMIT_CODES,
+                     mangadex_queue, "mangadex", mangadex_downloads, metrics))
     t.daemon = True
     t.start()
     mangadex_threads.append(t)
@@ -248,16 +415,51 @@ print(f"Started {MANGADEX_WORKERS} MangaDex worker threads")
 ASURA_WORKERS = 2
 asura_threads = []
 for i in range(ASURA_WORKERS):
-    t = Thread(target=asura_worker, args=(i, asura_queue, s3_upload_queue))
+    t = Thread(target=source_worker,
+               args=(AsuraComicHelper, f"Worker AS-{i}", asura_limiter, ASURA_RATE_LIMIT_CODES,
+                     asura_queue, "asura", asura_downloads, metrics))
     t.daemon = True
     t.start()
     asura_threads.append(t)
 print(f"Started {ASURA_WORKERS} AsuraComic worker threads")
 
+# ── Download workers ──────────────────────────────────────────────────────────
+# Asura renders chapters in a Chrome driver per thread, so it gets fewer
+MANGADEX_DOWNLOADERS = 4
+ASURA_DOWNLOADERS    = 1
+download_threads = []
+for helper_cls, prefix, count, source_downloads in (
+    (MangaDexHelper,   "MD", MANGADEX_DOWNLOADERS, mangadex_downloads),
+    (AsuraComicHelper, "AS", ASURA_DOWNLOADERS,    asura_downloads),
+):
+    for i in range(count):
+        t = Thread(target=download_worker,
+                   args=(helper_cls, f"Download {prefix}-{i}", source_downloads, s3_upload_queue, metrics))
+        t.daemon = True
+        t.start()
+        download_threads.append(t)
+print(f"Started {MANGADEX_DOWNLOADERS + ASURA_DOWNLOADERS} download worker threads")
+
+# ── Downloads left over from the last run ─────────────────────────────────────
+restored = 0
+for manga_id, source, payload, attempts in sqlite_helper.get_pending_downloads():
+    source_downloads = download_queues.get(source)
+    if source_downloads is None or attempts >= MAX_DOWNLOAD_ATTEMPTS:
+        sqlite_helper.finish_download(manga_id)
+        continue
+    processing_manga[manga_id] = DOWNLOAD_PENDING
+    source_downloads.put((MangaFactory(json.loads(payload)), True, attempts))
+    restored += 1
+if restored:
+    print(f"Restored {restored} pending downloads")
+
 # ── Configuration ─────────────────────────────────────────────────────────────
 MANGADEX_MAX_OFFSET = 4000
+MANGADEX_PAGE_SIZE  = 25         # MangaDexHelper.pagnation_limit
 ASURA_MAX_OFFSET    = 20 * 100   # 100 pages × 20 items
-CYCLE_SLEEP         = 5 * 60
+ASURA_PAGE_SIZE     = 20         # asura_helper.ITEMS_PER_PAGE
+CYCLE_SLEEP         = 5 * 60   # longest wait between queue checks
+LOW_WATER           = 2        # queue another cycle once a queue drops below this
 
 print("\n" + "=" * 60)
 print("Multi-Source Manga Scraper Started!")
@@ -267,39 +469,38 @@ print(f"MangaDex workers  : {MANGADEX_WORKERS}  (offsets 0–{MANGADEX_MAX_OFFSE
 print(f"AsuraComic workers: {ASURA_WORKERS}  (offsets 0–{ASURA_MAX_OFFSET})")
 print("=" * 60 + "\n")
 
-md_cycle_offset    = 0
-asura_cycle_offset = 0
+# Every page exactly once per lap. MangaDex offset 0 (the newest updates)
+# is queued every cycle on top, so the cycle starts one page in.
+md_offsets    = itertools.cycle(range(MANGADEX_PAGE_SIZE, MANGADEX_MAX_OFFSET, MANGADEX_PAGE_SIZE))
+asura_offsets = itertools.cycle(range(0, ASURA_MAX_OFFSET, ASURA_PAGE_SIZE))
 
 while True:
     try:
+        # Cleared before the queues are looked at, so a worker finishing
+        # while they are topped up still wakes the wait below
+        batch_done.clear()
+
         # ── MangaDex offsets ──────────────────────────────────────────────────
-        for i in range(MANGADEX_WORKERS):
-            offset = 0 if i == 0 else (
-                ((md_cycle_offset + i - 1) % (MANGADEX_MAX_OFFSET // 8)) * 8 + 8
-            )
-            mangadex_queue.put(offset)
-            print(f"[Main] MangaDex offset queued: {offset}")
-        md_cycle_offset += MANGADEX_WORKERS - 1
+        if mangadex_queue.qsize() < LOW_WATER:
+            for i in range(MANGADEX_WORKERS):
+                offset = 0 if i == 0 else next(md_offsets)
+                mangadex_queue.put(offset)
+                logger.info("[Main] MangaDex offset queued: %s", offset)
 
         # ── AsuraComic offsets (one per worker per cycle) ─────────────────────
-        for i in range(ASURA_WORKERS):
-            asura_offset = (
-                ((asura_cycle_offset + i) % (ASURA_MAX_OFFSET // ASURA_WORKERS))
-                * ASURA_WORKERS * 20
-            )
-            asura_queue.put(asura_offset)
-            print(f"[Main] AsuraComic offset queued: {asura_offset}")
-        asura_cycle_offset += 1
-
-        print(f"[Main] Sleeping {CYCLE_SLEEP // 60} minutes")
-        time.sleep(CYCLE_SLEEP)
+        if asura_queue.qsize() < LOW_WATER:
+            for _ in range(ASURA_WORKERS):
+                asura_offset = next(asura_offsets)
+                asura_queue.put(asura_offset)
+                logger.info("[Main] AsuraComic offset queued: %s", asura_offset)
+
+        # Wake as soon as any worker finishes an offset; the timeout only
+        # matters when every worker is stuck on a slow page
+        batch_done.wait(timeout=CYCLE_SLEEP)
 
     except KeyboardInterrupt:
         print("\n[Main] Shutting down...")
 
-        print("[Main] Performing final S3 upload...")
-        sqlite_helper.data_to_s3()
-
         # Poison pills
         for _ in range(MANGADEX_WORKERS):
             mangadex_queue.put(None)
@@ -309,11 +510,23 @@ while True:
         for t in mangadex_threads + asura_threads:
             t.join()
 
+        # Pollers are done; let the download workers finish what is queued
+        for _ in range(MANGADEX_DOWNLOADERS):
+            mangadex_downloads.put(None)
+        for _ in range(ASURA_DOWNLOADERS):
+            asura_downloads.put(None)
+        for t in download_threads:
+            t.join()
+
+        print("[Main] Performing final S3 upload...")
+        sqlite_helper.data_to_s3()
+
         metrics.shutdown()
+        log_listener.stop()
         print("[Main] Shutdown complete")
         break
 
     except Exception as exc:
-        print(f"[Main] Error: {exc}")
+        logger.warning("[Main] Error: %s", exc)
         metrics.record_error("api_errors")
         time.sleep(CYCLE_SLEEP)
\ No newline at end of file